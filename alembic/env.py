@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import make_url
 
 from alembic import context
 
@@ -22,8 +23,13 @@ import config as app_config
 # access to the values within the .ini file in use.
 config = context.config
 
-# Override sqlalchemy.url with DATABASE_URL from environment
-config.set_main_option('sqlalchemy.url', app_config.DATABASE_URL)
+# Override sqlalchemy.url with DATABASE_URL from environment (on the psycopg 3 driver, like the app);
+# '%' is doubled because configparser treats it as interpolation
+config.set_main_option(
+    'sqlalchemy.url',
+    make_url(app_config.DATABASE_URL).set(drivername='postgresql+psycopg')
+    .render_as_string(hide_password=False).replace('%', '%%')
+)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
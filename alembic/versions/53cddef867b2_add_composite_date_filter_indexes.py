@@ -0,0 +1,38 @@
+"""Add composite date-filter indexes and trigram company index
+
+Revision ID: 53cddef867b2
+Revises: 1e23297fda48
+Create Date: 2026-10-15 10:12:41.512034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '53cddef867b2'
+down_revision: Union[str, Sequence[str], None] = '1e23297fda48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dates are stored as ISO-8601 text, so lexicographic order matches
+    # chronological order and range predicates can use these btree indexes.
+    op.create_index('idx_ca_exdate_type', 'corporate_actions', ['ex_date', 'action_type'], unique=False)
+    op.create_index('idx_ca_finaldate_type_market', 'corporate_actions', ['final_date', 'action_type', 'market_code'], unique=False)
+
+    # Trigram index so ILIKE '%name%' company searches avoid a sequential scan
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('idx_ca_company_trgm', 'corporate_actions', ['company_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'company_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_ca_company_trgm', table_name='corporate_actions')
+    op.drop_index('idx_ca_finaldate_type_market', table_name='corporate_actions')
+    op.drop_index('idx_ca_exdate_type', table_name='corporate_actions')
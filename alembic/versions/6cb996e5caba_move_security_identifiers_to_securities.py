@@ -0,0 +1,81 @@
+"""Move security_id/symbol/isin into a securities table
+
+Revision ID: 6cb996e5caba
+Revises: d99144d7c585
+Create Date: 2026-10-15 13:24:08.311527
+
+company_name and market_code stay on corporate_actions: they are part of
+uix_company_action_market_dates and back the company search indexes.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6cb996e5caba'
+down_revision: Union[str, Sequence[str], None] = 'd99144d7c585'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('securities',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('company_name', sa.String(length=500), nullable=False),
+    sa.Column('market_code', sa.String(length=10), nullable=True),
+    sa.Column('security_id', sa.Integer(), nullable=True),
+    sa.Column('symbol', sa.String(length=50), nullable=True),
+    sa.Column('isin', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('company_name', 'market_code', name='uix_security_company_market')
+    )
+    op.create_index(op.f('ix_securities_security_id'), 'securities', ['security_id'], unique=False)
+
+    # One security per company/market, keeping any identifier already looked up
+    op.execute("""
+        INSERT INTO securities (company_name, market_code, security_id, symbol, isin)
+        SELECT company_name, market_code, max(security_id), max(symbol), max(isin)
+        FROM corporate_actions
+        GROUP BY company_name, market_code
+    """)
+
+    op.add_column('corporate_actions', sa.Column('security_fk', sa.Integer(), nullable=True))
+    op.execute("""
+        UPDATE corporate_actions ca
+        SET security_fk = s.id
+        FROM securities s
+        WHERE s.company_name = ca.company_name
+          AND s.market_code IS NOT DISTINCT FROM ca.market_code
+    """)
+    op.create_foreign_key('fk_corporate_actions_security', 'corporate_actions', 'securities', ['security_fk'], ['id'])
+    op.create_index(op.f('ix_corporate_actions_security_fk'), 'corporate_actions', ['security_fk'], unique=False)
+
+    op.drop_index(op.f('ix_corporate_actions_security_id'), table_name='corporate_actions')
+    op.drop_column('corporate_actions', 'isin')
+    op.drop_column('corporate_actions', 'symbol')
+    op.drop_column('corporate_actions', 'security_id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('corporate_actions', sa.Column('security_id', sa.Integer(), nullable=True))
+    op.add_column('corporate_actions', sa.Column('symbol', sa.String(length=50), nullable=True))
+    op.add_column('corporate_actions', sa.Column('isin', sa.String(length=50), nullable=True))
+    op.create_index(op.f('ix_corporate_actions_security_id'), 'corporate_actions', ['security_id'], unique=False)
+
+    op.execute("""
+        UPDATE corporate_actions ca
+        SET security_id = s.security_id, symbol = s.symbol, isin = s.isin
+        FROM securities s
+        WHERE s.id = ca.security_fk
+    """)
+
+    op.drop_index(op.f('ix_corporate_actions_security_fk'), table_name='corporate_actions')
+    op.drop_constraint('fk_corporate_actions_security', 'corporate_actions', type_='foreignkey')
+    op.drop_column('corporate_actions', 'security_fk')
+    op.drop_index(op.f('ix_securities_security_id'), table_name='securities')
+    op.drop_table('securities')
@@ -0,0 +1,41 @@
+"""Convert action_type to a PostgreSQL enum
+
+Revision ID: 90115d918348
+Revises: e982745aa0a8
+Create Date: 2026-10-15 12:18:06.337950
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '90115d918348'
+down_revision: Union[str, Sequence[str], None] = 'e982745aa0a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+action_type_enum = postgresql.ENUM('dividend', 'bonus', 'split', 'rights', name='action_type_enum')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    action_type_enum.create(op.get_bind(), checkfirst=True)
+    op.alter_column('corporate_actions', 'action_type',
+                    existing_type=sa.String(length=50),
+                    type_=action_type_enum,
+                    existing_nullable=False,
+                    postgresql_using='action_type::action_type_enum')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('corporate_actions', 'action_type',
+                    existing_type=action_type_enum,
+                    type_=sa.String(length=50),
+                    existing_nullable=False,
+                    postgresql_using='action_type::text')
+    action_type_enum.drop(op.get_bind(), checkfirst=True)
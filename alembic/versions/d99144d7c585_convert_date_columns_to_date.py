@@ -0,0 +1,43 @@
+"""Convert announcement/ex/record/final dates from text to DATE
+
+Revision ID: d99144d7c585
+Revises: 90115d918348
+Create Date: 2026-10-15 12:51:44.019873
+
+Existing values must already be YYYY-MM-DD (run fix_date_formats.py first on
+legacy data); empty strings become NULL.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd99144d7c585'
+down_revision: Union[str, Sequence[str], None] = '90115d918348'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DATE_COLUMNS = ('announcement_date', 'ex_date', 'record_date', 'final_date')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in DATE_COLUMNS:
+        op.alter_column('corporate_actions', column,
+                        existing_type=sa.String(length=50),
+                        type_=sa.Date(),
+                        existing_nullable=True,
+                        postgresql_using=f"NULLIF({column}, '')::date")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in DATE_COLUMNS:
+        op.alter_column('corporate_actions', column,
+                        existing_type=sa.Date(),
+                        type_=sa.String(length=50),
+                        existing_nullable=True,
+                        postgresql_using=f"to_char({column}, 'YYYY-MM-DD')")
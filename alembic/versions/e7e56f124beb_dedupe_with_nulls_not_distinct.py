@@ -0,0 +1,48 @@
+"""Make uix_company_action_market_dates treat NULLs as equal
+
+Revision ID: e7e56f124beb
+Revises: 6cb996e5caba
+Create Date: 2026-10-15 13:58:31.640215
+
+The processors rely on ON CONFLICT against this constraint instead of a Python
+duplicate check, so rows with a NULL announcement/ex date or market must
+conflict too. Requires PostgreSQL 15+.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7e56f124beb'
+down_revision: Union[str, Sequence[str], None] = '6cb996e5caba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UNIQUE_COLUMNS = ['company_name', 'action_type', 'market_code', 'announcement_date', 'ex_date']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicates the old constraint let through because of NULLs, keeping the oldest row
+    op.execute("""
+        DELETE FROM corporate_actions a
+        USING corporate_actions b
+        WHERE a.id > b.id
+          AND a.company_name = b.company_name
+          AND a.action_type = b.action_type
+          AND a.market_code IS NOT DISTINCT FROM b.market_code
+          AND a.announcement_date IS NOT DISTINCT FROM b.announcement_date
+          AND a.ex_date IS NOT DISTINCT FROM b.ex_date
+    """)
+    op.drop_constraint('uix_company_action_market_dates', 'corporate_actions', type_='unique')
+    op.create_unique_constraint('uix_company_action_market_dates', 'corporate_actions', UNIQUE_COLUMNS,
+                                postgresql_nulls_not_distinct=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uix_company_action_market_dates', 'corporate_actions', type_='unique')
+    op.create_unique_constraint('uix_company_action_market_dates', 'corporate_actions', UNIQUE_COLUMNS)
@@ -0,0 +1,28 @@
+"""Add (ex_date, id) index for keyset pagination
+
+Revision ID: e982745aa0a8
+Revises: f1bb770de7ab
+Create Date: 2026-10-15 11:40:53.870112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e982745aa0a8'
+down_revision: Union[str, Sequence[str], None] = 'f1bb770de7ab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_ca_exdate_id', 'corporate_actions', ['ex_date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_ca_exdate_id', table_name='corporate_actions')
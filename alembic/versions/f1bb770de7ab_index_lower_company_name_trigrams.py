@@ -0,0 +1,34 @@
+"""Index lower(company_name) trigrams for case-insensitive search
+
+Revision ID: f1bb770de7ab
+Revises: 53cddef867b2
+Create Date: 2026-10-15 11:02:17.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1bb770de7ab'
+down_revision: Union[str, Sequence[str], None] = '53cddef867b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('idx_ca_company_lower_trgm', 'corporate_actions',
+                    [sa.text('lower(company_name) gin_trgm_ops')], unique=False, postgresql_using='gin')
+    # Company search now filters on lower(company_name); the plain trigram index is unused
+    op.drop_index('idx_ca_company_trgm', table_name='corporate_actions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('idx_ca_company_trgm', 'corporate_actions', ['company_name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'company_name': 'gin_trgm_ops'})
+    op.drop_index('idx_ca_company_lower_trgm', table_name='corporate_actions')
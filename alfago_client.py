@@ -2,12 +2,100 @@
 Alfago Security ID Fetcher
 Fetches security_id, symbol, ISIN from Alfago API based on company name
 """
+import asyncio
+import os
+import aiohttp
+import diskcache
 import requests
-import time
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
 from typing import Dict, Optional, List
+from urllib3.util.retry import Retry
+import config
+
+ALFAGO_URL = "https://alfago.in/api/alfagrow/security/get"
+
+_DISK_CACHE_EXPIRE = 7 * 86400
+_MISS = object()
+
+
+@lru_cache(maxsize=None)
+def _disk_cache() -> diskcache.Cache:
+    """Persistent cache so repeat runs skip companies seen in the last week (opened on first use, not at import)"""
+    return diskcache.Cache(os.path.join(config.TMP_DIR, 'alfago_cache'))
+
+# Shared keep-alive session so lookups reuse pooled TCP/TLS connections
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                       max_retries=Retry(total=3, backoff_factor=0.3))
+_session.mount('https://', _adapter)
+_session.headers.update({'Accept': 'application/json', 'Connection': 'keep-alive'})
+
+
+def _select_security(securities: List[Dict], market_code: str = None) -> Dict:
+    """Pick the security matching market_code (or the first one) from an Alfago result list"""
+    # If market_code is specified, try to find matching market
+    if market_code:
+        for sec in securities:
+            # Check if market_code1 or market_code2 matches
+            if sec.get('market_code1') == market_code or sec.get('market_code2') == market_code:
+                return {
+                    'security_id': sec.get('id'),
+                    'symbol': sec.get('symbol1') or sec.get('symbol2'),
+                    'isin': sec.get('isin'),
+                    'market_code': market_code,
+                    'company_name': sec.get('company_name')
+                }
+    
+    # Default: return first result
+    sec = securities[0]
+    # Determine primary market (prefer NSE over BSE)
+    primary_market = sec.get('market_code1') or sec.get('market_code2') or market_code
+    
+    return {
+        'security_id': sec.get('id'),
+        'symbol': sec.get('symbol1') or sec.get('symbol2'),
+        'isin': sec.get('isin'),
+        'market_code': primary_market,
+        'company_name': sec.get('company_name')
+    }
+
+
+@lru_cache(maxsize=4096)
+def _lookup_security(company_name: str, market_code: str = None) -> Optional[Dict]:
+    """
+    Memoized Alfago lookup keyed on (company_name, market_code)
+    
+    Backed by the on-disk cache. "Not found" answers are cached like any other
+    result; transport and HTTP errors raise instead so that they are retried
+    on the next call.
+    """
+    key = (company_name, market_code)
+    cached = _disk_cache().get(key, default=_MISS)
+    if cached is not _MISS:
+        return cached
+    
+    url = f"{ALFAGO_URL}/{company_name}"
+    response = _session.get(url, timeout=10)
+    
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"Status {response.status_code}")
+    
+    if 'application/json' not in response.headers.get('content-type', ''):
+        print(f"⚠️  Non-JSON response for {company_name}")
+        return None
+    
+    data = response.json()
+    
+    if data.get('status') != 'success' or not data.get('data'):
+        print(f"⚠️  No data found for {company_name}")
+        result = None
+    else:
+        result = _select_security(data['data'], market_code)
+    
+    _disk_cache().set(key, result, expire=_DISK_CACHE_EXPIRE)
+    return result
 
-# Cache to avoid repeated API calls
-_SECURITY_CACHE = {}
 
 def fetch_security_id(company_name: str, market_code: str = None) -> Optional[Dict]:
     """
@@ -20,63 +108,11 @@ def fetch_security_id(company_name: str, market_code: str = None) -> Optional[Di
     Returns:
         Dict with security_id, symbol, isin, market_code or None if not found
     """
-    # Check cache first
-    cache_key = f"{company_name}_{market_code or 'ANY'}"
-    if cache_key in _SECURITY_CACHE:
-        return _SECURITY_CACHE[cache_key]
-    
     try:
-        # Call Alfago API
-        url = f"https://alfago.in/api/alfagrow/security/get/{company_name}"
-        response = requests.get(url, timeout=10)
-        
-        if response.status_code != 200:
-            print(f"⚠️  API error for {company_name}: Status {response.status_code}")
-            return None
-        
-        if 'application/json' not in response.headers.get('content-type', ''):
-            print(f"⚠️  Non-JSON response for {company_name}")
-            return None
-        
-        data = response.json()
-        
-        if data.get('status') != 'success' or not data.get('data'):
-            print(f"⚠️  No data found for {company_name}")
-            return None
-        
-        securities = data['data']
-        
-        # If market_code is specified, try to find matching market
-        if market_code:
-            for sec in securities:
-                # Check if market_code1 or market_code2 matches
-                if sec.get('market_code1') == market_code or sec.get('market_code2') == market_code:
-                    result = {
-                        'security_id': sec.get('id'),
-                        'symbol': sec.get('symbol1') or sec.get('symbol2'),
-                        'isin': sec.get('isin'),
-                        'market_code': market_code,
-                        'company_name': sec.get('company_name')
-                    }
-                    _SECURITY_CACHE[cache_key] = result
-                    return result
-        
-        # Default: return first result
-        sec = securities[0]
-        # Determine primary market (prefer NSE over BSE)
-        primary_market = sec.get('market_code1') or sec.get('market_code2') or market_code
-        
-        result = {
-            'security_id': sec.get('id'),
-            'symbol': sec.get('symbol1') or sec.get('symbol2'),
-            'isin': sec.get('isin'),
-            'market_code': primary_market,
-            'company_name': sec.get('company_name')
-        }
-        
-        _SECURITY_CACHE[cache_key] = result
-        return result
-        
+        return _lookup_security(company_name, market_code)
+    except requests.exceptions.HTTPError as e:
+        print(f"⚠️  API error for {company_name}: {str(e)}")
+        return None
     except requests.exceptions.Timeout:
         print(f"⏱️  Timeout fetching {company_name}")
         return None
@@ -85,49 +121,103 @@ def fetch_security_id(company_name: str, market_code: str = None) -> Optional[Di
         return None
 
 
-def fetch_security_batch(company_names: List[str], market_code: str = None, delay: float = 0.05) -> Dict[str, Dict]:
+async def fetch_security_batch_async(company_names: List[str], market_code: str = None,
+                                     concurrency: int = 16) -> Dict[str, Dict]:
     """
-    Fetch security IDs for multiple companies with rate limiting
+    Fetch security IDs for multiple companies concurrently
     
     Args:
         company_names: List of company names
         market_code: 'NSE' or 'BSE' preference
-        delay: Delay between requests in seconds (default 0.05)
+        concurrency: Maximum number of requests in flight (default 16)
     
     Returns:
         Dict mapping company_name -> security info
     """
     results = {}
-    total = len(company_names)
-    found = 0
-    not_found = 0
+    pending = []
+    for company_name in company_names:
+        cached = _disk_cache().get((company_name, market_code), default=_MISS)
+        if cached is _MISS:
+            pending.append(company_name)
+        elif cached:
+            results[company_name] = cached
+    
+    total = len(pending)
+    done = 0
+    print(f"📊 Fetching security IDs for {total} companies ({len(company_names) - total} cached, {concurrency} concurrent requests)...")
     
-    print(f"📊 Fetching security IDs for {total} companies (this may take ~{int(total * delay)} seconds)...")
+    # The semaphore replaces the old per-request sleep as the rate limit
+    semaphore = asyncio.Semaphore(concurrency)
     
-    for idx, company_name in enumerate(company_names, 1):
-        # Progress indicator every 10 companies
-        if idx % 10 == 0 or idx == total:
-            print(f"   Progress: {idx}/{total} ({int(idx/total*100)}%) - Found: {found}, Not found: {not_found}")
+    async def _one(session: aiohttp.ClientSession, company_name: str) -> Optional[Dict]:
+        nonlocal done
+        async with semaphore:
+            try:
+                async with session.get(f"{ALFAGO_URL}/{company_name}") as response:
+                    if response.status != 200:
+                        print(f"⚠️  API error for {company_name}: Status {response.status}")
+                        return None
+                    
+                    if response.content_type != 'application/json':
+                        print(f"⚠️  Non-JSON response for {company_name}")
+                        return None
+                    
+                    data = await response.json()
+            except asyncio.TimeoutError:
+                print(f"⏱️  Timeout fetching {company_name}")
+                return None
+            except Exception as e:
+                print(f"❌ Error fetching {company_name}: {str(e)}")
+                return None
+            finally:
+                done += 1
+                # Progress indicator every 10 companies
+                if done % 10 == 0 or done == total:
+                    print(f"   Progress: {done}/{total} ({int(done/total*100)}%)")
         
-        security_info = fetch_security_id(company_name, market_code)
-        if security_info:
-            results[company_name] = security_info
-            found += 1
+        if data.get('status') != 'success' or not data.get('data'):
+            print(f"⚠️  No data found for {company_name}")
+            result = None
         else:
-            not_found += 1
+            result = _select_security(data['data'], market_code)
+        
+        _disk_cache().set((company_name, market_code), result, expire=_DISK_CACHE_EXPIRE)
+        return result
+    
+    if pending:
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            lookups = await asyncio.gather(*[_one(session, name) for name in pending])
         
-        # Rate limiting
-        if idx < total:
-            time.sleep(delay)
+        for company_name, security_info in zip(pending, lookups):
+            if security_info:
+                results[company_name] = security_info
     
-    print(f"✅ Complete: {found} found, {not_found} not found out of {total} companies")
+    print(f"✅ Complete: {len(results)} found, {len(company_names) - len(results)} not found out of {len(company_names)} companies")
     return results
 
 
+def fetch_security_batch(company_names: List[str], market_code: str = None, concurrency: int = 16) -> Dict[str, Dict]:
+    """
+    Fetch security IDs for multiple companies (blocking wrapper around fetch_security_batch_async)
+    
+    Args:
+        company_names: List of company names
+        market_code: 'NSE' or 'BSE' preference
+        concurrency: Maximum number of requests in flight (default 16)
+    
+    Returns:
+        Dict mapping company_name -> security info
+    """
+    return asyncio.run(fetch_security_batch_async(company_names, market_code, concurrency))
+
+
 def clear_cache():
-    """Clear the security ID cache"""
-    global _SECURITY_CACHE
-    _SECURITY_CACHE = {}
+    """Clear the security ID cache (in-memory and on-disk)"""
+    _lookup_security.cache_clear()
+    _disk_cache().clear()
     print("🗑️  Security cache cleared")
 
 
@@ -1,19 +1,25 @@
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from brotli_asgi import BrotliMiddleware
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy import func, and_, or_, select, tuple_, cast, case, Integer, Text
 import os
-import subprocess
-from datetime import datetime, timedelta
+import hashlib
+import threading
+import orjson
+from cachetools import TTLCache, cached
+from datetime import date, datetime, timedelta
 
 # Import database and models
-from database import get_db, engine
-from models import CorporateAction, Base
+from database import get_db, engine, AsyncSessionLocal
+from models import CorporateAction, Security, Base
 import schemas
+import daily_updater_new
 
 # Create tables (in production, use Alembic migrations)
 # Base.metadata.create_all(bind=engine)
@@ -22,6 +28,7 @@ app = FastAPI(
     title="Prowess Corporate Actions API",
     description="Corporate Actions data from CMIE Prowess (PostgreSQL)",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Allow all origins by default (matches README_API.md). Change as needed.
@@ -33,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses over 1KB: Brotli when the client accepts it, gzip otherwise
+app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=True)
+
 # Mount static files if available (same behavior as main.py)
 if os.path.exists("static"):
     app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -57,97 +67,333 @@ def favicon():
 ### Corporate Actions Endpoints (PostgreSQL + SQLAlchemy) ###
 
 
-@app.get("/api/v1/corporate-actions", response_model=schemas.CorporateActionsResponse)
-def get_corporate_actions(
+@cached(TTLCache(maxsize=1, ttl=1))
+def _today() -> date:
+    # Recomputed at most once per second across all requests
+    return date.today()
+
+
+async def get_today() -> date:
+    """Dependency: today's date used by every date filter"""
+    return _today()
+
+
+def days_from(today: date, days: int) -> date:
+    """Return the date `days` after `today`"""
+    return today + timedelta(days=days)
+
+
+# Rendered GET responses, keyed on (path, query string). Data only changes on
+# refresh, so a short TTL is safe; the lock guards TTLCache across worker threads.
+_response_cache = TTLCache(maxsize=512, ttl=60)
+_response_cache_lock = threading.Lock()
+
+
+def _etag_response(request: Request, body: bytes, etag: str) -> Response:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def cached_response(request: Request) -> Optional[Response]:
+    """Return the cached response for this request (or a 304) if one is still fresh"""
+    with _response_cache_lock:
+        entry = _response_cache.get((request.url.path, request.url.query))
+    if entry is None:
+        return None
+    return _etag_response(request, *entry)
+
+
+def json_response(request: Request, payload: dict) -> Response:
+    """Serialize payload with orjson, cache it for this request and tag it with an ETag"""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    with _response_cache_lock:
+        _response_cache[(request.url.path, request.url.query)] = (body, etag)
+    return _etag_response(request, body, etag)
+
+
+def invalidate_response_cache():
+    """Drop all cached responses (called after a refresh changes the data)"""
+    with _response_cache_lock:
+        _response_cache.clear()
+
+
+def json_agg_columns(rows):
+    """(JSON array text, row count) over a subquery, so Postgres serializes the rows instead of Python"""
+    return (
+        # Cast to text: the drivers would otherwise decode the json back into Python objects
+        func.coalesce(cast(func.json_agg(rows.table_valued()), Text), '[]'),
+        func.count(),
+    )
+
+
+def make_cursor(ex_date: Optional[date], row_id: int) -> str:
+    """Page cursor carrying the last row's own sort key: "<ex_date>,<id>" (empty date for NULL)"""
+    return f"{ex_date.isoformat() if ex_date else ''},{row_id}"
+
+
+def parse_cursor(cursor: str) -> tuple:
+    """(ex_date or None, id) from a make_cursor string; 400 if it is malformed"""
+    date_part, _, id_part = cursor.partition(",")
+    try:
+        return (date.fromisoformat(date_part) if date_part else None), int(id_part)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor}")
+
+
+def after_cursor(ex_date: Optional[date], row_id: int):
+    """Rows after (ex_date, id) in "ex_date ASC NULLS LAST, id ASC" order, spelled out so NULL dates compare"""
+    if ex_date is None:
+        return and_(CorporateAction.ex_date.is_(None), CorporateAction.id > row_id)
+    return or_(
+        tuple_(CorporateAction.ex_date, CorporateAction.id) > tuple_(ex_date, row_id),
+        CorporateAction.ex_date.is_(None),
+    )
+
+
+def company_matches(name: str):
+    """Case-insensitive partial company match, shaped to use the lower(company_name) trigram index"""
+    return func.lower(CorporateAction.company_name).like(f"%{name.lower()}%")
+
+
+# Columns returned by each endpoint. Selecting columns (Core rows) instead of
+# CorporateAction instances skips ORM hydration; rows convert straight to dicts.
+ACTION_COLUMNS = (
+    CorporateAction.id,
+    CorporateAction.company_name,
+    CorporateAction.action_type,
+    CorporateAction.announcement_date,
+    CorporateAction.ex_date,
+    CorporateAction.record_date,
+    CorporateAction.final_date,
+    CorporateAction.dividend_rate,
+    CorporateAction.dividend_type,
+    CorporateAction.ratio_numerator,
+    CorporateAction.ratio_denominator,
+    CorporateAction.security_type,
+    # New fields from Alfago API
+    Security.security_id,
+    CorporateAction.market_code,
+    Security.symbol,
+    Security.isin,
+    # Split fields
+    CorporateAction.old_face_value,
+    CorporateAction.new_face_value,
+    CorporateAction.split_ratio,
+    # Rights fields
+    CorporateAction.rights_ratio_numerator,
+    CorporateAction.rights_ratio_denominator,
+    CorporateAction.rights_price,
+    CorporateAction.created_at,
+)
+
+DETAIL_COLUMNS = (
+    CorporateAction.id,
+    CorporateAction.company_name,
+    CorporateAction.action_type,
+    CorporateAction.market_code,
+    Security.security_id,
+    Security.symbol,
+    Security.isin,
+    CorporateAction.announcement_date,
+    CorporateAction.ex_date,
+    CorporateAction.record_date,
+    CorporateAction.final_date,
+    CorporateAction.dividend_rate,
+    CorporateAction.dividend_type,
+    CorporateAction.ratio_numerator,
+    CorporateAction.ratio_denominator,
+    CorporateAction.old_face_value,
+    CorporateAction.new_face_value,
+    CorporateAction.split_ratio,
+    CorporateAction.rights_ratio_numerator,
+    CorporateAction.rights_ratio_denominator,
+    CorporateAction.rights_price,
+    CorporateAction.security_type,
+)
+
+COMPANY_COLUMNS = (
+    CorporateAction.id,
+    CorporateAction.company_name,
+    CorporateAction.action_type,
+    CorporateAction.announcement_date,
+    CorporateAction.ex_date,
+    CorporateAction.record_date,
+    CorporateAction.final_date,
+    CorporateAction.dividend_rate,
+    CorporateAction.dividend_type,
+    CorporateAction.ratio_numerator,
+    CorporateAction.ratio_denominator,
+    CorporateAction.security_type,
+)
+
+DIVIDEND_COLUMNS = (
+    CorporateAction.company_name,
+    CorporateAction.announcement_date,
+    CorporateAction.ex_date,
+    CorporateAction.dividend_rate,
+    CorporateAction.dividend_type,
+)
+
+BONUS_COLUMNS = (
+    CorporateAction.company_name,
+    CorporateAction.announcement_date,
+    CorporateAction.ex_date,
+    CorporateAction.ratio_numerator,
+    CorporateAction.ratio_denominator,
+    CorporateAction.security_type,
+    # "num:den" with both parts truncated to integers; NULL when either side is missing or zero
+    case(
+        (
+            and_(CorporateAction.ratio_numerator != 0, CorporateAction.ratio_denominator != 0),
+            func.concat(
+                cast(func.trunc(CorporateAction.ratio_numerator), Integer), ':',
+                cast(func.trunc(CorporateAction.ratio_denominator), Integer),
+            ),
+        ),
+        else_=None,
+    ).label('ratio_display'),
+)
+
+# Base statements are built once at import; requests only append their filters,
+# so the compiled SQL is reused from the engine's statement cache
+# Symbol/ISIN come from securities; outer join keeps actions whose lookup failed
+_WITH_SECURITY = CorporateAction.__table__.outerjoin(Security, CorporateAction.security_fk == Security.id)
+
+_BASE_ACTIONS = select(*ACTION_COLUMNS).select_from(_WITH_SECURITY)
+_BASE_DETAILS = select(*DETAIL_COLUMNS).select_from(_WITH_SECURITY)
+_BASE_COMPANY = select(*COMPANY_COLUMNS)
+_BASE_DIVIDENDS = select(*DIVIDEND_COLUMNS).where(CorporateAction.action_type == 'dividend')
+_BASE_BONUS = select(*BONUS_COLUMNS).where(CorporateAction.action_type == 'bonus')
+_BASE_COUNT_BY_TYPE = select(
+    CorporateAction.action_type,
+    func.count(CorporateAction.id).label('count')
+).group_by(CorporateAction.action_type)
+
+
+@app.get("/api/v1/corporate-actions", responses={200: {"model": schemas.CorporateActionsResponse}})
+async def get_corporate_actions(
+    request: Request,
     company: Optional[str] = Query(None, description="Filter by company name (partial match)"),
-    action_type: Optional[str] = Query(None, description="Filter by action type: 'bonus' or 'dividend'"),
+    action_type: Optional[schemas.ActionType] = Query(None, description="Filter by action type: 'bonus', 'dividend', 'split' or 'rights'"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records"),
     show_all: bool = Query(False, description="If true, do not filter by ex_date (useful for debugging)"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor: return records after this one (next_cursor of the previous page)"),
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get corporate actions with optional filters"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
+    after = parse_cursor(cursor) if cursor is not None else None
+
     try:
         # Build query
-        query = db.query(CorporateAction)
+        stmt = _BASE_ACTIONS
         
         # Date filter (unless show_all is True)
         if not show_all:
-            today = datetime.now().date().isoformat()
-            query = query.filter(CorporateAction.ex_date >= today)
+            stmt = stmt.where(CorporateAction.ex_date >= today)
         
         # Company filter
         if company:
-            query = query.filter(CorporateAction.company_name.ilike(f"%{company}%"))
+            stmt = stmt.where(company_matches(company))
         
         # Action type filter
         if action_type:
-            query = query.filter(CorporateAction.action_type == action_type.lower())
+            stmt = stmt.where(CorporateAction.action_type == action_type)
         
-        # Order and limit
-        query = query.order_by(CorporateAction.ex_date.asc()).limit(limit)
+        # Keyset pagination: continue after the cursor's (ex_date, id)
+        if after is not None:
+            stmt = stmt.where(after_cursor(*after))
         
-        # Execute query
-        results = query.all()
+        # Order and limit (id breaks ties so pages are stable; NULL ex_dates sort last)
+        stmt = stmt.order_by(CorporateAction.ex_date.asc().nulls_last(), CorporateAction.id.asc()).limit(limit)
         
-        # Convert to dictionaries
-        records = []
-        for record in results:
-            record_dict = {
-                "id": record.id,
-                "company_name": record.company_name,
-                "action_type": record.action_type,
-                "announcement_date": record.announcement_date,
-                "ex_date": record.ex_date,
-                "record_date": record.record_date,
-                "final_date": record.final_date,
-                "dividend_rate": record.dividend_rate,
-                "dividend_type": record.dividend_type,
-                "ratio_numerator": record.ratio_numerator,
-                "ratio_denominator": record.ratio_denominator,
-                "security_type": record.security_type,
-                # New fields from Alfago API
-                "security_id": record.security_id,
-                "market_code": record.market_code,
-                "symbol": record.symbol,
-                "isin": record.isin,
-                # Split fields
-                "old_face_value": record.old_face_value,
-                "new_face_value": record.new_face_value,
-                "split_ratio": record.split_ratio,
-                # Rights fields
-                "rights_ratio_numerator": record.rights_ratio_numerator,
-                "rights_ratio_denominator": record.rights_ratio_denominator,
-                "rights_price": record.rights_price,
-                "created_at": record.created_at.isoformat() if record.created_at else None
-            }
-            records.append(record_dict)
+        # Execute query; the page comes back as a single JSON array
+        rows = stmt.subquery()
+        data, count, last_ex_date, last_id = (await db.execute(select(
+            *json_agg_columns(rows),
+            # last row in page order
+            func.array_agg(rows.c.ex_date)[func.count()],
+            func.array_agg(rows.c.id)[func.count()],
+        ))).one()
         
-        return {
+        return json_response(request, {
             "status": "success",
-            "count": len(records),
-            "data": records,
+            "count": count,
+            "data": orjson.Fragment(data),
+            "next_cursor": make_cursor(last_ex_date, last_id) if count == limit else None,
             "metadata": {
                 "filters_applied": {"company": company, "action_type": action_type, "limit": limit},
-                "query_time": datetime.utcnow().isoformat(),
+                "query_time": datetime.utcnow(),
             },
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+@app.get("/api/v1/corporate-actions/stream")
+async def stream_corporate_actions(
+    company: Optional[str] = Query(None, description="Filter by company name (partial match)"),
+    action_type: Optional[schemas.ActionType] = Query(None, description="Filter by action type: 'bonus', 'dividend', 'split' or 'rights'"),
+    show_all: bool = Query(False, description="If true, do not filter by ex_date (useful for debugging)"),
+    today: date = Depends(get_today),
+):
+    """Stream all matching corporate actions as newline-delimited JSON"""
+    stmt = _BASE_ACTIONS
+    
+    # Date filter (unless show_all is True)
+    if not show_all:
+        stmt = stmt.where(CorporateAction.ex_date >= today)
+    
+    # Company filter
+    if company:
+        stmt = stmt.where(company_matches(company))
+    
+    # Action type filter
+    if action_type:
+        stmt = stmt.where(CorporateAction.action_type == action_type)
+    
+    # Postgres renders each row, so values look the same as in the json_agg endpoints
+    rows = stmt.subquery()
+    stmt = (
+        select(cast(func.row_to_json(rows.table_valued()), Text))
+        .order_by(rows.c.ex_date.asc())
+        .execution_options(yield_per=200)  # fetch 200 rows at a time from a server-side cursor
+    )
+    
+    async def generate():
+        # The session must outlive the endpoint, so it is owned by the generator
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt)
+            async for line in result.scalars():
+                yield line.encode() + b"\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @app.get("/api/v1/corporate-actions/upcoming")
-def get_upcoming_actions(
+async def get_upcoming_actions(
+    request: Request,
     days_ahead: int = Query(30, ge=1, le=365, description="Days to look ahead"),
-    action_type: Optional[str] = Query(None, description="Filter by action type"),
-    db: Session = Depends(get_db)
+    action_type: Optional[schemas.ActionType] = Query(None, description="Filter by action type"),
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get upcoming corporate actions (final_date >= today) within specified days"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
     try:
-        today = datetime.now().date().isoformat()
-        future_date = (datetime.now().date() + timedelta(days=days_ahead)).isoformat()
+        future_date = days_from(today, days_ahead)
         
         # Build query - using final_date for upcoming events
-        query = db.query(CorporateAction).filter(
+        stmt = _BASE_DETAILS.where(
             and_(
                 CorporateAction.final_date >= today,
                 CorporateAction.final_date <= future_date
@@ -156,354 +402,302 @@ def get_upcoming_actions(
         
         # Action type filter
         if action_type:
-            query = query.filter(CorporateAction.action_type == action_type.lower())
+            stmt = stmt.where(CorporateAction.action_type == action_type)
         
         # Order by final_date
-        query = query.order_by(CorporateAction.final_date.asc())
-        
-        # Execute query
-        results = query.all()
+        stmt = stmt.order_by(CorporateAction.final_date.asc())
         
-        # Convert to dictionaries with all fields
-        records = []
-        for record in results:
-            record_dict = {
-                "id": record.id,
-                "company_name": record.company_name,
-                "action_type": record.action_type,
-                "market_code": record.market_code,
-                "security_id": record.security_id,
-                "symbol": record.symbol,
-                "isin": record.isin,
-                "announcement_date": record.announcement_date,
-                "ex_date": record.ex_date,
-                "record_date": record.record_date,
-                "final_date": record.final_date,
-                "dividend_rate": record.dividend_rate,
-                "dividend_type": record.dividend_type,
-                "ratio_numerator": record.ratio_numerator,
-                "ratio_denominator": record.ratio_denominator,
-                "old_face_value": record.old_face_value,
-                "new_face_value": record.new_face_value,
-                "split_ratio": record.split_ratio,
-                "rights_ratio_numerator": record.rights_ratio_numerator,
-                "rights_ratio_denominator": record.rights_ratio_denominator,
-                "rights_price": record.rights_price,
-                "security_type": record.security_type,
-            }
-            records.append(record_dict)
+        # Execute query; rows come back as a single JSON array
+        data, count = (await db.execute(select(*json_agg_columns(stmt.subquery())))).one()
 
-        return {
+        return json_response(request, {
             "status": "success",
-            "count": len(records),
-            "upcoming_actions": records,
+            "count": count,
+            "upcoming_actions": orjson.Fragment(data),
             "days_ahead": days_ahead,
             "date_range": {"from": today, "to": future_date},
-            "query_time": datetime.utcnow().isoformat(),
-        }
+            "query_time": datetime.utcnow(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 @app.get("/api/v1/corporate-actions/today")
-def get_today_actions(
-    action_type: Optional[str] = Query(None, description="Filter by action type"),
+async def get_today_actions(
+    request: Request,
+    action_type: Optional[schemas.ActionType] = Query(None, description="Filter by action type"),
     market_code: Optional[str] = Query(None, description="Filter by market: NSE or BSE"),
-    db: Session = Depends(get_db)
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get corporate actions with final_date = today (for immediate action)"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
     try:
-        today = datetime.now().date().isoformat()
-        
         # Build query - final_date equals today
-        query = db.query(CorporateAction).filter(
+        stmt = _BASE_DETAILS.where(
             CorporateAction.final_date == today
         )
         
         # Action type filter
         if action_type:
-            query = query.filter(CorporateAction.action_type == action_type.lower())
+            stmt = stmt.where(CorporateAction.action_type == action_type)
         
         # Market filter
         if market_code:
-            query = query.filter(CorporateAction.market_code == market_code.upper())
+            stmt = stmt.where(CorporateAction.market_code == market_code.upper())
         
         # Order by company name
-        query = query.order_by(CorporateAction.company_name.asc())
-        
-        # Execute query
-        results = query.all()
+        stmt = stmt.order_by(CorporateAction.company_name.asc())
         
-        # Convert to dictionaries with all fields
-        records = []
-        for record in results:
-            record_dict = {
-                "id": record.id,
-                "company_name": record.company_name,
-                "action_type": record.action_type,
-                "market_code": record.market_code,
-                "security_id": record.security_id,
-                "symbol": record.symbol,
-                "isin": record.isin,
-                "announcement_date": record.announcement_date,
-                "ex_date": record.ex_date,
-                "record_date": record.record_date,
-                "final_date": record.final_date,
-                "dividend_rate": record.dividend_rate,
-                "dividend_type": record.dividend_type,
-                "ratio_numerator": record.ratio_numerator,
-                "ratio_denominator": record.ratio_denominator,
-                "old_face_value": record.old_face_value,
-                "new_face_value": record.new_face_value,
-                "split_ratio": record.split_ratio,
-                "rights_ratio_numerator": record.rights_ratio_numerator,
-                "rights_ratio_denominator": record.rights_ratio_denominator,
-                "rights_price": record.rights_price,
-                "security_type": record.security_type,
-            }
-            records.append(record_dict)
+        # Execute query; rows come back as a single JSON array
+        data, count = (await db.execute(select(*json_agg_columns(stmt.subquery())))).one()
 
-        return {
+        return json_response(request, {
             "status": "success",
-            "count": len(records),
+            "count": count,
             "date": today,
-            "actions_today": records,
+            "actions_today": orjson.Fragment(data),
             "filters_applied": {"action_type": action_type, "market_code": market_code},
-            "query_time": datetime.utcnow().isoformat(),
-        }
+            "query_time": datetime.utcnow(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 @app.get("/api/v1/corporate-actions/dividends")
-def get_dividends(
+async def get_dividends(
+    request: Request,
     company: Optional[str] = Query(None, description="Filter by company name"),
     min_rate: Optional[float] = Query(None, description="Minimum dividend rate"),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get dividend corporate actions"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
     try:
-        today = datetime.now().date().isoformat()
-        
         # Build query for dividends only
-        query = db.query(CorporateAction).filter(
-            and_(
-                CorporateAction.action_type == 'dividend',
-                CorporateAction.ex_date >= today
-            )
-        )
+        stmt = _BASE_DIVIDENDS.where(CorporateAction.ex_date >= today)
         
         # Company filter
         if company:
-            query = query.filter(CorporateAction.company_name.ilike(f"%{company}%"))
+            stmt = stmt.where(company_matches(company))
         
         # Minimum rate filter
         if min_rate:
-            query = query.filter(CorporateAction.dividend_rate >= min_rate)
+            stmt = stmt.where(CorporateAction.dividend_rate >= min_rate)
         
         # Order and limit
-        query = query.order_by(CorporateAction.ex_date.asc()).limit(limit)
+        stmt = stmt.order_by(CorporateAction.ex_date.asc()).limit(limit)
         
-        # Execute query
-        results = query.all()
-        
-        # Convert to dictionaries
-        records = []
-        for record in results:
-            record_dict = {
-                "company_name": record.company_name,
-                "announcement_date": record.announcement_date,
-                "ex_date": record.ex_date,
-                "dividend_rate": record.dividend_rate,
-                "dividend_type": record.dividend_type,
-            }
-            records.append(record_dict)
+        # Execute query; rows come back as a single JSON array
+        data, count = (await db.execute(select(*json_agg_columns(stmt.subquery())))).one()
 
-        return {
+        return json_response(request, {
             "status": "success",
-            "dividend_count": len(records),
-            "dividends": records,
+            "dividend_count": count,
+            "dividends": orjson.Fragment(data),
             "filters": {"company": company, "min_rate": min_rate},
-            "query_time": datetime.utcnow().isoformat(),
-        }
+            "query_time": datetime.utcnow(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 @app.get("/api/v1/corporate-actions/bonus")
-def get_bonus_issues(
+async def get_bonus_issues(
+    request: Request,
     company: Optional[str] = Query(None, description="Filter by company name"),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get bonus issue corporate actions"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
     try:
-        today = datetime.now().date().isoformat()
-        
         # Build query for bonus issues only
-        query = db.query(CorporateAction).filter(
-            and_(
-                CorporateAction.action_type == 'bonus',
-                CorporateAction.ex_date >= today
-            )
-        )
+        stmt = _BASE_BONUS.where(CorporateAction.ex_date >= today)
         
         # Company filter
         if company:
-            query = query.filter(CorporateAction.company_name.ilike(f"%{company}%"))
+            stmt = stmt.where(company_matches(company))
         
         # Order and limit
-        query = query.order_by(CorporateAction.ex_date.asc()).limit(limit)
+        stmt = stmt.order_by(CorporateAction.ex_date.asc()).limit(limit)
         
-        # Execute query
-        results = query.all()
-        
-        # Convert to dictionaries
-        records = []
-        for record in results:
-            record_dict = {
-                "company_name": record.company_name,
-                "announcement_date": record.announcement_date,
-                "ex_date": record.ex_date,
-                "ratio_numerator": record.ratio_numerator,
-                "ratio_denominator": record.ratio_denominator,
-                "security_type": record.security_type,
-            }
-            # Add ratio display
-            if record.ratio_numerator and record.ratio_denominator:
-                try:
-                    record_dict['ratio_display'] = f"{int(record.ratio_numerator)}:{int(record.ratio_denominator)}"
-                except Exception:
-                    record_dict['ratio_display'] = None
-            else:
-                record_dict['ratio_display'] = None
-            
-            records.append(record_dict)
+        # Execute query; ratio_display is computed in the select, rows come back as a single JSON array
+        data, count = (await db.execute(select(*json_agg_columns(stmt.subquery())))).one()
 
-        return {
+        return json_response(request, {
             "status": "success",
-            "bonus_count": len(records),
-            "bonus_issues": records,
+            "bonus_count": count,
+            "bonus_issues": orjson.Fragment(data),
             "filters": {"company": company},
-            "query_time": datetime.utcnow().isoformat(),
-        }
+            "query_time": datetime.utcnow(),
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+
+@app.get("/api/v1/corporate-actions/companies")
+async def get_companies_actions(
+    request: Request,
+    names: List[str] = Query(..., description="Exact company names (repeat the parameter for each company)"),
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get upcoming corporate actions for several companies in a single query"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
+    try:
+        stmt = _BASE_COMPANY.where(
+            and_(
+                CorporateAction.company_name.in_(names),
+                CorporateAction.ex_date >= today
+            )
+        )
+        
+        # Execute query; Postgres builds each company's JSON array (by ex_date), as in the other endpoints
+        rows = stmt.subquery()
+        grouped = (await db.execute(
+            select(
+                rows.c.company_name,
+                cast(func.json_agg(aggregate_order_by(rows.table_valued(), rows.c.ex_date.asc())), Text),
+                func.count(),
+            ).group_by(rows.c.company_name)
+        )).all()
+        
+        # Keep an entry for every requested name
+        actions = {name: orjson.Fragment(b"[]") for name in names}
+        for name, data, _ in grouped:
+            actions[name] = orjson.Fragment(data)
+
+        return json_response(request, {
+            "status": "success",
+            "companies_count": len(actions),
+            "actions_count": sum(count for _, _, count in grouped),
+            "actions": actions,
+            "query_time": datetime.utcnow(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 @app.get("/api/v1/corporate-actions/company/{company_name}")
-def get_company_actions(
+async def get_company_actions(
+    request: Request,
     company_name: str,
-    db: Session = Depends(get_db)
+    today: date = Depends(get_today),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all upcoming corporate actions for a specific company"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
     try:
-        today = datetime.now().date().isoformat()
-        
         # Build query
-        query = db.query(CorporateAction).filter(
+        stmt = _BASE_COMPANY.where(
             and_(
-                CorporateAction.company_name.ilike(f"%{company_name}%"),
+                company_matches(company_name),
                 CorporateAction.ex_date >= today
             )
         ).order_by(CorporateAction.ex_date.asc())
         
-        # Execute query
-        results = query.all()
+        # Execute query; rows come back as a single JSON array
+        data, count = (await db.execute(select(*json_agg_columns(stmt.subquery())))).one()
         
-        if not results:
+        if not count:
             raise HTTPException(status_code=404, detail=f"No upcoming actions found for company: {company_name}")
-        
-        # Convert to dictionaries
-        records = []
-        for record in results:
-            record_dict = {
-                "id": record.id,
-                "company_name": record.company_name,
-                "action_type": record.action_type,
-                "announcement_date": record.announcement_date,
-                "ex_date": record.ex_date,
-                "record_date": record.record_date,
-                "final_date": record.final_date,
-                "dividend_rate": record.dividend_rate,
-                "dividend_type": record.dividend_type,
-                "ratio_numerator": record.ratio_numerator,
-                "ratio_denominator": record.ratio_denominator,
-                "security_type": record.security_type,
-            }
-            records.append(record_dict)
 
-        return {
+        return json_response(request, {
             "status": "success",
             "company": company_name,
-            "actions_count": len(records),
-            "actions": records,
-            "query_time": datetime.utcnow().isoformat(),
-        }
+            "actions_count": count,
+            "actions": orjson.Fragment(data),
+            "query_time": datetime.utcnow(),
+        })
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-@app.post("/api/v1/corporate-actions/refresh")
-def refresh_corporate_actions():
+# Only one refresh may run at a time
+_refresh_lock = threading.Lock()
+
+
+def _run_refresh():
+    if not _refresh_lock.acquire(blocking=False):
+        return
     try:
-        result = subprocess.run(['python', 'daily_updater.py'], capture_output=True, text=True, cwd='.')
-
-        if result.returncode == 0:
-            output = result.stdout
-            return {
-                "status": "success",
-                "message": "Corporate actions data refreshed successfully",
-                "refresh_time": datetime.utcnow().isoformat(),
-                "details": output.split('\n')[-10:],
-            }
-        else:
-            raise HTTPException(status_code=500, detail=f"Refresh failed: {result.stderr}")
+        daily_updater_new.run_daily_update()
+    finally:
+        invalidate_response_cache()
+        _refresh_lock.release()
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Refresh error: {str(e)}")
+
+@app.post("/api/v1/corporate-actions/refresh", status_code=202)
+async def refresh_corporate_actions(background_tasks: BackgroundTasks):
+    """Queue an in-process data refresh (fetch, update, cleanup) and return immediately"""
+    if _refresh_lock.locked():
+        return {
+            "status": "running",
+            "message": "A refresh is already in progress",
+            "refresh_time": datetime.utcnow(),
+        }
+
+    background_tasks.add_task(_run_refresh)
+    return {
+        "status": "queued",
+        "message": "Corporate actions refresh started in the background",
+        "refresh_time": datetime.utcnow(),
+    }
 
 
-@app.get("/api/v1/corporate-actions/stats", response_model=schemas.StatsResponse)
-def get_stats(db: Session = Depends(get_db)):
+@app.get("/api/v1/corporate-actions/stats", responses={200: {"model": schemas.StatsResponse}})
+async def get_stats(request: Request, today: date = Depends(get_today), db: AsyncSession = Depends(get_db)):
     """Get statistics about corporate actions"""
+    hit = cached_response(request)
+    if hit is not None:
+        return hit
+
     try:
-        today = datetime.now().date().isoformat()
-        week_ahead = (datetime.now().date() + timedelta(days=7)).isoformat()
+        week_ahead = days_from(today, 7)
         
-        # Total active actions
-        total_active = db.query(func.count(CorporateAction.id)).filter(
-            CorporateAction.ex_date >= today
-        ).scalar()
+        # Active and this-week totals in a single scan using conditional aggregates
+        total_active, upcoming_week = (await db.execute(
+            select(
+                func.count(CorporateAction.id),
+                func.count(CorporateAction.id).filter(CorporateAction.ex_date <= week_ahead),
+            ).where(CorporateAction.ex_date >= today)
+        )).one()
         
         # Count by action type
-        by_type_query = db.query(
-            CorporateAction.action_type,
-            func.count(CorporateAction.id).label('count')
-        ).filter(
-            CorporateAction.ex_date >= today
-        ).group_by(CorporateAction.action_type).all()
-        
-        by_type = [{"action_type": action_type, "count": count} for action_type, count in by_type_query]
+        by_type_rows = (await db.execute(
+            _BASE_COUNT_BY_TYPE.where(CorporateAction.ex_date >= today)
+        )).all()
         
-        # Upcoming this week
-        upcoming_week = db.query(func.count(CorporateAction.id)).filter(
-            and_(
-                CorporateAction.ex_date >= today,
-                CorporateAction.ex_date <= week_ahead
-            )
-        ).scalar()
+        by_type = [{"action_type": action_type, "count": count} for action_type, count in by_type_rows]
 
-        return {
+        return json_response(request, {
             "status": "success",
             "total_active_actions": total_active or 0,
             "by_type": by_type,
             "upcoming_this_week": upcoming_week or 0,
-            "last_updated": datetime.utcnow().isoformat(),
-        }
+            "last_updated": datetime.utcnow(),
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stats error: {str(e)}")
 
@@ -15,3 +15,7 @@ DATABASE_URL = os.getenv(
 
 TMP_DIR = "./tmp"
 os.makedirs(TMP_DIR, exist_ok=True)
+
+# Parquet copies of parsed JSON batch files, keyed by content hash
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", os.path.join(TMP_DIR, "parse_cache"))
+os.makedirs(PARSE_CACHE_DIR, exist_ok=True)
@@ -2,48 +2,61 @@
 Comprehensive Corporate Actions Processor
 Processes all action types from NSE and BSE batch files
 """
-import json
 import os
-from typing import List, Dict
-from datetime import datetime
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import List, Dict, Optional
+from datetime import date, datetime
+import orjson
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import CorporateAction
+from models import Security
 import alfago_client
 
-def parse_date(date_str: str) -> str:
-    """Parse date string in various formats and return standardized YYYY-MM-DD format"""
+# Date shape -> the single strptime format that can parse it, most frequent first
+DATE_FORMATS = [
+    (re.compile(r'\d{4}-\d{1,2}-\d{1,2}'), '%Y-%m-%d'),      # "2025-10-17"
+    (re.compile(r'\d{1,2} [A-Za-z]{3} \d{4}'), '%d %b %Y'),   # "17 Oct 2025"
+    (re.compile(r'\d{1,2}-[A-Za-z]{3}-\d{4}'), '%d-%b-%Y'),   # "17-Oct-2025"
+    (re.compile(r'\d{1,2}-\d{1,2}-\d{4}'), '%d-%m-%Y'),      # "17-10-2025"
+    (re.compile(r'\d{1,2}/\d{1,2}/\d{4}'), '%d/%m/%Y'),      # "17/10/2025"
+]
+
+@lru_cache(maxsize=8192)  # the same date strings repeat across most rows of a file
+def parse_date(date_str: str) -> Optional[date]:
+    """Parse date string in various formats and return it as a date (stored in DATE columns)"""
     if not date_str or date_str == 'N.A.' or date_str == '':
         return None
     
-    # Try different date formats
-    formats = [
-        '%d %b %Y',  # "17 Oct 2025"
-        '%Y-%m-%d',  # "2025-10-17"
-        '%d-%m-%Y',  # "17-10-2025"
-        '%d/%m/%Y',  # "17/10/2025"
-        '%d-%b-%Y',  # "17-Oct-2025"
-    ]
-    
-    for fmt in formats:
+    # Fast path: already in YYYY-MM-DD format
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
         try:
-            dt = datetime.strptime(date_str.strip(), fmt)
-            # Always return in YYYY-MM-DD format
-            return dt.strftime('%Y-%m-%d')
+            return date.fromisoformat(date_str)
         except ValueError:
-            continue
-    
-    # If already in correct format, return as-is
-    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
-        return date_str
+            pass
+    
+    # Every known format starts with a digit and is 8-20 characters long; anything else
+    # (placeholders, free text) skips the regexes and strptime entirely
+    value = date_str.strip()
+    if value and value[0].isdigit() and 8 <= len(value) <= 20:
+        # Pick the format by shape, so strptime runs (and can fail) at most once
+        for pattern, fmt in DATE_FORMATS:
+            if pattern.fullmatch(value):
+                try:
+                    return datetime.strptime(value, fmt).date()
+                except ValueError:
+                    break  # right shape but not a real date
     
     print(f"⚠️  Could not parse date: {date_str}")
     return None
 
 def parse_json_file(file_path: str) -> Dict:
     """Parse JSON file and return head/data structure"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(file_path, 'rb') as f:
+        data = orjson.loads(f.read())
     
     if isinstance(data, dict) and 'head' in data and 'data' in data:
         return {
@@ -53,27 +66,124 @@ def parse_json_file(file_path: str) -> Dict:
     return None
 
 
-def process_bonus_data(file_path: str, market_code: str, db: Session) -> int:
+# Built once at import so its compiled form is reused for every file; parameters are
+# bound per call. Previously known identifiers are kept when a lookup came back empty.
+_insert_security = insert(Security)
+UPSERT_SECURITY = _insert_security.on_conflict_do_update(
+    constraint='uix_security_company_market',
+    set_={
+        col: func.coalesce(_insert_security.excluded[col], Security.__table__.c[col])
+        for col in ('security_id', 'symbol', 'isin')
+    }
+).returning(Security.id, Security.company_name)
+
+
+def upsert_securities(company_names: List[str], security_map: Dict, market_code: str, db: Session,
+                      isin_map: Dict = None) -> Dict[str, int]:
+    """
+    Insert or refresh one securities row per company and return their primary keys
+    
+    Args:
+        company_names: Companies referenced by the file (rows are created even when Alfago has no match)
+        security_map: Company name -> Alfago security info
+        market_code: 'NSE' or 'BSE'
+        db: Database session
+        isin_map: Optional company name -> ISIN taken from the source file, preferred over Alfago's
+    
+    Returns:
+        Dict mapping company name to securities.id (committed)
+    """
+    if not company_names:
+        return {}
+    
+    isin_map = isin_map or {}
+    values = []
+    # Sorted so concurrent upserts from other files lock rows in the same order
+    for company_name in sorted(company_names):
+        security_info = security_map.get(company_name) or {}
+        values.append({
+            'company_name': company_name,
+            'market_code': market_code,
+            'security_id': security_info.get('security_id'),
+            'symbol': security_info.get('symbol'),
+            'isin': isin_map.get(company_name) or security_info.get('isin'),
+        })
+    
+    # executemany with RETURNING: the statement is compiled once and batched into multi-row INSERTs
+    result = db.execute(UPSERT_SECURITY, values)
+    security_ids = {company_name: security_fk for security_fk, company_name in result}
+    # Commit now: same-market files share most companies, and holding these row locks through
+    # the COPY would make their handlers wait on each other
+    db.commit()
+    return security_ids
+
+
+def bulk_copy_actions(to_insert: List[Dict], db: Session) -> int:
+    """
+    Load prepared corporate action mappings with COPY into a temp stage table, then merge them
+    into corporate_actions, skipping rows that hit uix_company_action_market_dates
+    
+    Args:
+        to_insert: Column -> value dicts, all with the same keys
+        db: Database session (the stage is dropped when its transaction commits)
+    
+    Returns:
+        Number of rows actually inserted
+    """
+    if not to_insert:
+        return 0
+    
+    columns = list(to_insert[0])
+    column_list = ', '.join(columns)
+    
+    conn = db.connection()
+    conn.exec_driver_sql("DROP TABLE IF EXISTS pg_temp.corporate_actions_stage")
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE corporate_actions_stage ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM corporate_actions WITH NO DATA"
+    )
+    
+    # psycopg 3 adapts each value (None -> NULL, dates, floats) as rows are written
+    with conn.connection.cursor() as cursor:
+        with cursor.copy(f"COPY corporate_actions_stage ({column_list}) FROM STDIN") as copy:
+            for row in to_insert:
+                copy.write_row([row[col] for col in columns])
+    
+    # created_at only has an ORM-side default, which raw SQL doesn't apply
+    result = conn.exec_driver_sql(
+        f"INSERT INTO corporate_actions ({column_list}, created_at) "
+        f"SELECT {column_list}, now() FROM corporate_actions_stage "
+        f"ON CONFLICT ON CONSTRAINT uix_company_action_market_dates DO NOTHING"
+    )
+    return result.rowcount
+
+
+def process_bonus_data(file_path: str, market_code: str, db: Session, parsed: Optional[Dict] = None) -> int:
     """
     Process bonus issue data from NSE/BSE
     
     Expected columns:
     [Company Name, ISIN, Security Type, Announcement Date, Ex-Date, Numerator, Denominator]
+    
+    parsed: parse_json_file(file_path) if the caller already has it
     """
     print(f"📊 Processing {market_code} bonus data: {file_path}")
     
-    parsed = parse_json_file(file_path)
+    if parsed is None:
+        parsed = parse_json_file(file_path)
     if not parsed:
         print(f"❌ Could not parse {file_path}")
         return 0
     
     rows = parsed['rows']
-    added_count = 0
+    to_insert = []
     
     # Get unique company names for batch fetching security IDs
-    unique_companies = list(set([row[0] for row in rows if row and len(row) > 0]))
+    unique_companies = list(dict.fromkeys(row[0] for row in rows if row and row[0]))
     print(f"🔍 Fetching security IDs for {len(unique_companies)} companies...")
-    security_map = alfago_client.fetch_security_batch(unique_companies, market_code, delay=0.05)
+    security_map = alfago_client.fetch_security_batch(unique_companies, market_code)
+    isin_map = {row[0]: row[1] for row in rows if row and len(row) > 1 and row[1] != 'N.A.'}
+    security_ids = upsert_securities(unique_companies, security_map, market_code, db, isin_map)
     
     for row in rows:
         if not row or len(row) < 7:
@@ -81,36 +191,17 @@ def process_bonus_data(file_path: str, market_code: str, db: Session) -> int:
         
         try:
             company_name = row[0]
-            isin = row[1] if row[1] != 'N.A.' else None
             security_type = row[2]
             announcement_date = parse_date(row[3]) if row[3] else None
             ex_date = parse_date(row[4]) if row[4] else None
             ratio_num = float(row[5]) if row[5] and row[5] != 'N.A.' else None
             ratio_den = float(row[6]) if row[6] and row[6] != 'N.A.' else None
             
-            # Get security ID
-            security_info = security_map.get(company_name)
-            security_id = security_info['security_id'] if security_info else None
-            symbol = security_info['symbol'] if security_info else None
-            
-            # Check if record already exists
-            existing = db.query(CorporateAction).filter(
-                CorporateAction.company_name == company_name,
-                CorporateAction.action_type == 'bonus',
-                CorporateAction.market_code == market_code,
-                CorporateAction.ex_date == ex_date
-            ).first()
-            
-            if existing:
-                continue
-            
-            # Create new record
-            action = CorporateAction(
+            # Queue new record; duplicates are skipped by ON CONFLICT in bulk_copy_actions
+            to_insert.append(dict(
                 company_name=company_name,
-                security_id=security_id,
                 market_code=market_code,
-                symbol=symbol,
-                isin=isin,
+                security_fk=security_ids.get(company_name),
                 action_type='bonus',
                 announcement_date=announcement_date,
                 ex_date=ex_date,
@@ -118,42 +209,44 @@ def process_bonus_data(file_path: str, market_code: str, db: Session) -> int:
                 ratio_numerator=ratio_num,
                 ratio_denominator=ratio_den,
                 security_type=security_type,
-                raw_data=json.dumps(row)
-            )
-            
-            db.add(action)
-            added_count += 1
+                raw_data=orjson.dumps(row).decode()
+            ))
             
         except Exception as e:
             print(f"⚠️  Error processing bonus row: {e}")
             continue
     
+    added_count = bulk_copy_actions(to_insert, db)
     db.commit()
     print(f"✅ Added {added_count} bonus records for {market_code}")
     return added_count
 
 
-def process_dividend_data(file_path: str, market_code: str, db: Session) -> int:
+def process_dividend_data(file_path: str, market_code: str, db: Session, parsed: Optional[Dict] = None) -> int:
     """
     Process dividend data from NSE/BSE
     
     Expected columns:
     [Company Name, Announcement Date, Ex-Date, Dividend Rate, Dividend Type, Record Date]
+    
+    parsed: parse_json_file(file_path) if the caller already has it
     """
     print(f"💰 Processing {market_code} dividend data: {file_path}")
     
-    parsed = parse_json_file(file_path)
+    if parsed is None:
+        parsed = parse_json_file(file_path)
     if not parsed:
         print(f"❌ Could not parse {file_path}")
         return 0
     
     rows = parsed['rows']
-    added_count = 0
+    to_insert = []
     
     # Get unique company names for batch fetching security IDs
-    unique_companies = list(set([row[0] for row in rows if row and len(row) > 0]))
+    unique_companies = list(dict.fromkeys(row[0] for row in rows if row and row[0]))
     print(f"🔍 Fetching security IDs for {len(unique_companies)} companies...")
-    security_map = alfago_client.fetch_security_batch(unique_companies, market_code, delay=0.05)
+    security_map = alfago_client.fetch_security_batch(unique_companies, market_code)
+    security_ids = upsert_securities(unique_companies, security_map, market_code, db)
     
     for row in rows:
         if not row or len(row) < 6:
@@ -167,30 +260,11 @@ def process_dividend_data(file_path: str, market_code: str, db: Session) -> int:
             dividend_type = row[4]
             record_date = parse_date(row[5]) if row[5] else None
             
-            # Get security ID
-            security_info = security_map.get(company_name)
-            security_id = security_info['security_id'] if security_info else None
-            symbol = security_info['symbol'] if security_info else None
-            isin = security_info['isin'] if security_info else None
-            
-            # Check if record already exists
-            existing = db.query(CorporateAction).filter(
-                CorporateAction.company_name == company_name,
-                CorporateAction.action_type == 'dividend',
-                CorporateAction.market_code == market_code,
-                CorporateAction.ex_date == ex_date
-            ).first()
-            
-            if existing:
-                continue
-            
-            # Create new record
-            action = CorporateAction(
+            # Queue new record; duplicates are skipped by ON CONFLICT in bulk_copy_actions
+            to_insert.append(dict(
                 company_name=company_name,
-                security_id=security_id,
                 market_code=market_code,
-                symbol=symbol,
-                isin=isin,
+                security_fk=security_ids.get(company_name),
                 action_type='dividend',
                 announcement_date=announcement_date,
                 ex_date=ex_date,
@@ -198,43 +272,45 @@ def process_dividend_data(file_path: str, market_code: str, db: Session) -> int:
                 final_date=ex_date,
                 dividend_rate=dividend_rate,
                 dividend_type=dividend_type,
-                raw_data=json.dumps(row)
-            )
-            
-            db.add(action)
-            added_count += 1
+                raw_data=orjson.dumps(row).decode()
+            ))
             
         except Exception as e:
             print(f"⚠️  Error processing dividend row: {e}")
             continue
     
+    added_count = bulk_copy_actions(to_insert, db)
     db.commit()
     print(f"✅ Added {added_count} dividend records for {market_code}")
     return added_count
 
 
-def process_split_data(file_path: str, market_code: str, db: Session) -> int:
+def process_split_data(file_path: str, market_code: str, db: Session, parsed: Optional[Dict] = None) -> int:
     """
     Process stock split data from NSE/BSE
     
     Expected columns:
     [Company Name, Capital issue Type, Security Type, Date of Announcement, Capital issue Date,
      Ratio Numerator, Ratio Denominator, X Price, X Date, Returns on X Date]
+    
+    parsed: parse_json_file(file_path) if the caller already has it
     """
     print(f"✂️  Processing {market_code} split data: {file_path}")
     
-    parsed = parse_json_file(file_path)
+    if parsed is None:
+        parsed = parse_json_file(file_path)
     if not parsed:
         print(f"❌ Could not parse {file_path}")
         return 0
     
     rows = parsed['rows']
-    added_count = 0
+    to_insert = []
     
     # Get unique company names
-    unique_companies = list(set([row[0] for row in rows if row and len(row) > 0]))
+    unique_companies = list(dict.fromkeys(row[0] for row in rows if row and row[0]))
     print(f"🔍 Fetching security IDs for {len(unique_companies)} companies...")
-    security_map = alfago_client.fetch_security_batch(unique_companies, market_code, delay=0.05)
+    security_map = alfago_client.fetch_security_batch(unique_companies, market_code)
+    security_ids = upsert_securities(unique_companies, security_map, market_code, db)
     
     for row in rows:
         if not row or len(row) < 7:
@@ -244,36 +320,17 @@ def process_split_data(file_path: str, market_code: str, db: Session) -> int:
             company_name = row[0]
             # capital_type = row[1]  # Should be "Split"
             # security_type = row[2]  # "Equity shares"
-            announcement_date = parse_date(row[3])  # Returns YYYY-MM-DD string
-            ex_date = parse_date(row[4])  # Returns YYYY-MM-DD string
+            announcement_date = parse_date(row[3])
+            ex_date = parse_date(row[4])
             ratio_num = float(row[5]) if row[5] and row[5] != 'N.A.' else None
             ratio_den = float(row[6]) if row[6] and row[6] != 'N.A.' else None
             split_ratio = f"{ratio_num}:{ratio_den}" if ratio_num and ratio_den else None
             
-            # Get security ID from Alfago
-            security_info = security_map.get(company_name)
-            security_id = security_info['security_id'] if security_info else None
-            symbol = security_info['symbol'] if security_info else None
-            isin = security_info['isin'] if security_info else None
-            
-            # Check if record already exists
-            existing = db.query(CorporateAction).filter(
-                CorporateAction.company_name == company_name,
-                CorporateAction.action_type == 'split',
-                CorporateAction.market_code == market_code,
-                CorporateAction.ex_date == ex_date
-            ).first()
-            
-            if existing:
-                continue
-            
-            # Create new record
-            action = CorporateAction(
+            # Queue new record; duplicates are skipped by ON CONFLICT in bulk_copy_actions
+            to_insert.append(dict(
                 company_name=company_name,
-                security_id=security_id,
                 market_code=market_code,
-                symbol=symbol,
-                isin=isin,
+                security_fk=security_ids.get(company_name),
                 action_type='split',
                 announcement_date=announcement_date,
                 ex_date=ex_date,
@@ -281,42 +338,44 @@ def process_split_data(file_path: str, market_code: str, db: Session) -> int:
                 ratio_numerator=ratio_num,
                 ratio_denominator=ratio_den,
                 split_ratio=split_ratio,
-                raw_data=json.dumps(row)
-            )
-            
-            db.add(action)
-            added_count += 1
+                raw_data=orjson.dumps(row).decode()
+            ))
             
         except Exception as e:
             print(f"⚠️  Error processing split row: {e}")
             continue
     
+    added_count = bulk_copy_actions(to_insert, db)
     db.commit()
     print(f"✅ Added {added_count} split records for {market_code}")
     return added_count
 
 
-def process_rights_data(file_path: str, market_code: str, db: Session) -> int:
+def process_rights_data(file_path: str, market_code: str, db: Session, parsed: Optional[Dict] = None) -> int:
     """
     Process rights issue data from NSE
     
     Expected columns:
     [Company Name, ISIN, Announcement Date, Ex-Date, Ratio Num, Ratio Den, Rights Price]
+    
+    parsed: parse_json_file(file_path) if the caller already has it
     """
     print(f"📝 Processing {market_code} rights data: {file_path}")
     
-    parsed = parse_json_file(file_path)
+    if parsed is None:
+        parsed = parse_json_file(file_path)
     if not parsed:
         print(f"❌ Could not parse {file_path}")
         return 0
     
     rows = parsed['rows']
-    added_count = 0
+    to_insert = []
     
     # Get unique company names
-    unique_companies = list(set([row[0] for row in rows if row and len(row) > 0]))
+    unique_companies = list(dict.fromkeys(row[0] for row in rows if row and row[0]))
     print(f"🔍 Fetching security IDs for {len(unique_companies)} companies...")
-    security_map = alfago_client.fetch_security_batch(unique_companies, market_code, delay=0.05)
+    security_map = alfago_client.fetch_security_batch(unique_companies, market_code)
+    security_ids = upsert_securities(unique_companies, security_map, market_code, db)
     
     for row in rows:
         if not row or len(row) < 9:
@@ -325,37 +384,19 @@ def process_rights_data(file_path: str, market_code: str, db: Session) -> int:
         try:
             company_name = row[0]
             issue_type = row[1]  # Should be "Rights"
-            announcement_date = parse_date(row[3]) if row[3] and row[3] != 'N.A.' else None  # Returns YYYY-MM-DD
-            ex_date = parse_date(row[4]) if row[4] and row[4] != 'N.A.' else None  # Returns YYYY-MM-DD
+            announcement_date = parse_date(row[3]) if row[3] and row[3] != 'N.A.' else None
+            ex_date = parse_date(row[4]) if row[4] and row[4] != 'N.A.' else None
             
-            rights_num = float(row[7]) if row[7] and row[7] != 'N.A.' else None
-            rights_den = float(row[8]) if row[8] and row[8] != 'N.A.' else None
+            # INTEGER columns: COPY rejects "2.0", so round here as the old INSERT cast did
+            rights_num = round(float(row[7])) if row[7] and row[7] != 'N.A.' else None
+            rights_den = round(float(row[8])) if row[8] and row[8] != 'N.A.' else None
             rights_price = float(row[6]) if row[6] and row[6] != 'N.A.' else None
-            isin = None  # Not in this dataset
-            
-            # Get security ID
-            security_info = security_map.get(company_name)
-            security_id = security_info['security_id'] if security_info else None
-            symbol = security_info['symbol'] if security_info else None
-            
-            # Check if record already exists
-            existing = db.query(CorporateAction).filter(
-                CorporateAction.company_name == company_name,
-                CorporateAction.action_type == 'rights',
-                CorporateAction.market_code == market_code,
-                CorporateAction.ex_date == ex_date
-            ).first()
             
-            if existing:
-                continue
-            
-            # Create new record
-            action = CorporateAction(
+            # Queue new record; duplicates are skipped by ON CONFLICT in bulk_copy_actions
+            to_insert.append(dict(
                 company_name=company_name,
-                security_id=security_id,
                 market_code=market_code,
-                symbol=symbol,
-                isin=isin,
+                security_fk=security_ids.get(company_name),
                 action_type='rights',
                 announcement_date=announcement_date,
                 ex_date=ex_date,
@@ -363,25 +404,60 @@ def process_rights_data(file_path: str, market_code: str, db: Session) -> int:
                 rights_ratio_numerator=rights_num,
                 rights_ratio_denominator=rights_den,
                 rights_price=rights_price,
-                raw_data=json.dumps(row)
-            )
-            
-            db.add(action)
-            added_count += 1
+                raw_data=orjson.dumps(row).decode()
+            ))
             
         except Exception as e:
             print(f"⚠️  Error processing rights row: {e}")
             continue
     
+    added_count = bulk_copy_actions(to_insert, db)
     db.commit()
     print(f"✅ Added {added_count} rights records for {market_code}")
     return added_count
 
 
-def process_all_files(tmp_dir: str = "./tmp") -> Dict[str, int]:
+def _process_file(handler, file_path: str, market_code: str, parsed: Optional[Dict]) -> int:
+    """Run one file handler on its own session (sessions must not be shared across threads)"""
+    db = SessionLocal()
+    try:
+        return handler(file_path, market_code, db, parsed)
+    finally:
+        db.close()
+
+
+def prefetch_securities(jobs: List[tuple]) -> Dict[str, Optional[Dict]]:
+    """
+    Look up every company of every file once per market before the handlers start
+    
+    The files of a market share most companies and their handlers run at the same time, so
+    without this they would all miss the Alfago cache together and fetch the same names in
+    parallel. Afterwards each handler's fetch_security_batch is served from the cache.
+    
+    Returns:
+        Dict mapping file path to its parse_json_file result, handed to the handlers so no file is parsed twice
+    """
+    parsed_files = {}
+    companies_by_market = {}
+    for _, _, file_path, market in jobs:
+        parsed = parsed_files[file_path] = parse_json_file(file_path)
+        if parsed:
+            companies = companies_by_market.setdefault(market, {})
+            companies.update(dict.fromkeys(row[0] for row in parsed['rows'] if row and row[0]))
+    
+    for market, companies in companies_by_market.items():
+        print(f"🔍 Prefetching security IDs for {len(companies)} {market} companies...")
+        alfago_client.fetch_security_batch(list(companies), market)
+    
+    return parsed_files
+
+
+def process_all_files(tmp_dir: str = "./tmp", max_workers: int = 7) -> Dict[str, int]:
     """
     Process all corporate action files from tmp directory
     
+    Files are independent, so each one is processed concurrently in its own thread and session.
+    
     Returns:
         Dict with counts for each action type and market
     """
@@ -389,37 +465,42 @@ def process_all_files(tmp_dir: str = "./tmp") -> Dict[str, int]:
         print(f"❌ Directory not found: {tmp_dir}")
         return {}
     
-    db = SessionLocal()
     stats = {}
     
-    try:
-        # File mappings (filename pattern -> (action_handler, market_code))
-        file_handlers = {
-            'bonus_nse': (process_bonus_data, 'NSE'),
-            'bonus_bse': (process_bonus_data, 'BSE'),
-            'dividend_nse': (process_dividend_data, 'NSE'),
-            'dividend_bse': (process_dividend_data, 'BSE'),
-            'splits_nse': (process_split_data, 'NSE'),
-            'splits_bse': (process_split_data, 'BSE'),
-            'rights_nse': (process_rights_data, 'NSE'),
-        }
-        
-        # Process each file type
-        for file_pattern, (handler, market) in file_handlers.items():
-            # Look for JSON files matching the pattern
-            json_files = [f for f in os.listdir(tmp_dir) 
-                         if f.endswith('.json') and file_pattern.lower() in f.lower()]
-            
-            for json_file in json_files:
-                file_path = os.path.join(tmp_dir, json_file)
-                count = handler(file_path, market, db)
-                key = f"{file_pattern}_{market}"
-                stats[key] = stats.get(key, 0) + count
+    # File mappings (filename pattern -> (action_handler, market_code))
+    file_handlers = {
+        'bonus_nse': (process_bonus_data, 'NSE'),
+        'bonus_bse': (process_bonus_data, 'BSE'),
+        'dividend_nse': (process_dividend_data, 'NSE'),
+        'dividend_bse': (process_dividend_data, 'BSE'),
+        'splits_nse': (process_split_data, 'NSE'),
+        'splits_bse': (process_split_data, 'BSE'),
+        'rights_nse': (process_rights_data, 'NSE'),
+    }
+    
+    # Collect (stats key, handler, file path, market) for each file type
+    jobs = []
+    for file_pattern, (handler, market) in file_handlers.items():
+        # Look for JSON files matching the pattern
+        json_files = [f for f in os.listdir(tmp_dir) 
+                     if f.endswith('.json') and file_pattern.lower() in f.lower()]
         
-        return stats
+        for json_file in json_files:
+            jobs.append((f"{file_pattern}_{market}", handler, os.path.join(tmp_dir, json_file), market))
+    
+    parsed_files = prefetch_securities(jobs)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_process_file, handler, file_path, market, parsed_files[file_path]): key
+            for key, handler, file_path, market in jobs
+        }
         
-    finally:
-        db.close()
+        for future in as_completed(futures):
+            key = futures[future]
+            stats[key] = stats.get(key, 0) + future.result()
+    
+    return stats
 
 
 if __name__ == "__main__":
@@ -7,14 +7,63 @@ Daily Corporate Actions Updater - Enhanced Version
 """
 import prowess_client
 import corporate_actions_processor
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import os
 import shutil
+import tempfile
+import ijson
+import config
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from database import SessionLocal
 from models import CorporateAction
 
-def fetch_fresh_data():
-    """Fetch fresh data from all batch files"""
+def _fetch_one(batch_file, description, target_name):
+    """Send one batch file to Prowess, wait for it and save the detailed JSON as target_name"""
+    label = f"[{description.strip()}]"
+    print(f"{label} Fetching {batch_file}...")
+    
+    # Own extract directory: concurrent batches can return members with the same name
+    batch_dir = tempfile.mkdtemp(dir=config.TMP_DIR)
+    try:
+        token = prowess_client.send_batch(batch_file, "json")
+        files = prowess_client.get_batch(token, out_dir=batch_dir)
+        
+        # Find and rename the JSON file with actual data (not summary)
+        if files and len(files) > 0:
+            target_path = os.path.join("./tmp", target_name)
+            
+            # Try to find the file with most data (not just company list)
+            for source_file in files:
+                if os.path.exists(source_file) and source_file.endswith('.json'):
+                    # Check if this file has the detailed data structure
+                    try:
+                        # Stream just up to the first data row instead of parsing the whole file
+                        with open(source_file, 'rb') as f:
+                            first_row = next(ijson.items(f, 'data.item'), None)
+                        # Look for files with more than 2 columns (detailed data)
+                        if first_row and len(first_row) > 2:
+                            shutil.copyfile(source_file, target_path)  # Copy (not move); data only, sendfile on Linux
+                            print(f"{label} Got {len(files)} file(s), saved as {target_name}")
+                            return True
+                    except Exception:
+                        continue
+            
+            print(f"{label} No detailed data file found in {len(files)} file(s)")
+        else:
+            print(f"{label} No files received")
+            
+    except FileNotFoundError:
+        print(f"{label} File not found: {batch_file}")
+    except Exception as e:
+        print(f"{label} Fetch error: {e}")
+    finally:
+        shutil.rmtree(batch_dir, ignore_errors=True)
+    
+    return False
+
+
+def fetch_fresh_data(max_workers=7):
+    """Fetch fresh data from all batch files (concurrently; each batch is a long Prowess round-trip)"""
     print(" Fetching fresh data from Prowess...")
     print("=" * 60)
     
@@ -30,48 +79,12 @@ def fetch_fresh_data():
     ]
     
     successful_fetches = 0
-    total_files = len(batch_files)
     
-    for idx, (batch_file, description, target_name) in enumerate(batch_files, 1):
-        print(f"\n[{idx}/{total_files}] {description}")
-        print(f"Fetching {batch_file}...")
-        
-        try:
-            token = prowess_client.send_batch(batch_file, "json")
-            files = prowess_client.get_batch(token)
-            
-            # Find and rename the JSON file with actual data (not summary)
-            if files and len(files) > 0:
-                target_path = os.path.join("./tmp", target_name)
-                renamed = False
-                
-                # Try to find the file with most data (not just company list)
-                for source_file in files:
-                    if os.path.exists(source_file) and source_file.endswith('.json'):
-                        # Check if this file has the detailed data structure
-                        try:
-                            import json
-                            with open(source_file, 'r') as f:
-                                data = json.load(f)
-                                # Look for files with more than 2 columns (detailed data)
-                                if 'data' in data and len(data['data']) > 0 and len(data['data'][0]) > 2:
-                                    shutil.copy(source_file, target_path)  # Use copy instead of move
-                                    print(f" Got {len(files)} file(s), saved as {target_name}")
-                                    successful_fetches += 1
-                                    renamed = True
-                                    break
-                        except:
-                            continue
-                
-                if not renamed:
-                    print(f" No detailed data file found in {len(files)} file(s)")
-            else:
-                print(f" No files received")
-                
-        except FileNotFoundError:
-            print(f" File not found: {batch_file}")
-        except Exception as e:
-            print(f" Fetch error: {e}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_fetch_one, *batch) for batch in batch_files]
+        for future in as_completed(futures):
+            if future.result():
+                successful_fetches += 1
     
     print("\n" + "=" * 60)
     print(f" Fetch Summary: {successful_fetches}/{len(batch_files)} successful")
@@ -90,7 +103,7 @@ def update_database():
     
     if not stats:
         print("  No data was processed")
-        return
+        return {}
     
     print("\n Database Update Summary:")
     print("=" * 60)
@@ -103,6 +116,8 @@ def update_database():
     print("=" * 60)
     print(f" Total: {total_records} new records added")
     print("=" * 60)
+    
+    return stats
 
 
 def cleanup_old_records(days_old=10):
@@ -113,23 +128,17 @@ def cleanup_old_records(days_old=10):
     db = SessionLocal()
     try:
         # Calculate cutoff date
-        cutoff_date = (datetime.now() - timedelta(days=days_old)).strftime('%Y-%m-%d')
+        cutoff_date = date.today() - timedelta(days=days_old)
         
-        # Find old records
-        old_records = db.query(CorporateAction).filter(
+        # Delete old records in a single statement (no rows are loaded into the session)
+        count = db.query(CorporateAction).filter(
             CorporateAction.final_date < cutoff_date
-        ).all()
-        
-        count = len(old_records)
+        ).delete(synchronize_session=False)
         
         if count == 0:
             print(f" No records older than {days_old} days found")
             return 0
         
-        # Delete old records
-        for record in old_records:
-            db.delete(record)
-        
         db.commit()
         print(f" Deleted {count} old records (final_date < {cutoff_date})")
         return count
@@ -142,6 +151,31 @@ def cleanup_old_records(days_old=10):
         db.close()
 
 
+def run_daily_update(days_old=10):
+    """
+    Run the full update cycle: fetch from Prowess, update the database, clean up old records
+    
+    Returns:
+        Dict summarising the run (files fetched, new records per file type, records deleted)
+    """
+    summary = {"fetched_files": 0, "new_records": {}, "deleted_records": 0}
+    
+    # Step 1: Fetch fresh data
+    summary["fetched_files"] = fetch_fresh_data()
+    
+    if summary["fetched_files"] == 0:
+        print("\nNo data fetched. Exiting.")
+        return summary
+    
+    # Step 2: Update database
+    summary["new_records"] = update_database()
+    
+    # Step 3: Cleanup old records
+    summary["deleted_records"] = cleanup_old_records(days_old=days_old)
+    
+    return summary
+
+
 if __name__ == "__main__":
     # Set UTF-8 encoding for console output
     import sys
@@ -160,19 +194,11 @@ if __name__ == "__main__":
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
     
-    # Step 1: Fetch fresh data
-    fetch_count = fetch_fresh_data()
+    summary = run_daily_update(days_old=10)
     
-    if fetch_count == 0:
-        print("\nNo data fetched. Exiting.")
+    if summary["fetched_files"] == 0:
         exit(1)
     
-    # Step 2: Update database
-    update_database()
-    
-    # Step 3: Cleanup old records (10 days old)
-    cleanup_old_records(days_old=10)
-    
     print("\n" + "=" * 70)
     print(f" Update completed at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
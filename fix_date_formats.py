@@ -2,11 +2,26 @@
 """
 Fix date formats in existing database records
 Converts all dates to YYYY-MM-DD format
+
+Run this against databases that still store dates as text, before applying the
+migration that converts the date columns to DATE (it casts YYYY-MM-DD values).
 """
+from sqlalchemy import text
 from database import SessionLocal
-from models import CorporateAction
 from datetime import datetime
+from functools import lru_cache
+
+# Tried in order, most frequent first
+DATE_FORMATS = (
+    '%Y-%m-%d',   # "2025-10-17"
+    '%d %b %Y',   # "17 Oct 2025"
+    '%d-%b-%Y',   # "17-Oct-2025"
+    '%d-%m-%Y',   # "17-10-2025"
+    '%d/%m/%Y',   # "17/10/2025"
+    '%Y-%m-%d %H:%M:%S',  # "2025-10-17 00:00:00"
+)
 
+@lru_cache(maxsize=8192)  # the same date strings repeat across most records
 def parse_and_fix_date(date_str):
     """Parse various date formats and return YYYY-MM-DD"""
     if not date_str or date_str == 'N.A.' or date_str == '':
@@ -21,19 +36,10 @@ def parse_and_fix_date(date_str):
         except:
             pass
     
-    # Try different formats
-    formats = [
-        '%d %b %Y',   # "17 Oct 2025"
-        '%Y-%m-%d',   # "2025-10-17"
-        '%d-%m-%Y',   # "17-10-2025"
-        '%d/%m/%Y',   # "17/10/2025"
-        '%d-%b-%Y',   # "17-Oct-2025"
-        '%Y-%m-%d %H:%M:%S',  # "2025-10-17 00:00:00"
-    ]
-    
-    for fmt in formats:
+    value = date_str.strip()
+    for fmt in DATE_FORMATS:
         try:
-            dt = datetime.strptime(date_str.strip(), fmt)
+            dt = datetime.strptime(value, fmt)
             return dt.strftime('%Y-%m-%d')
         except ValueError:
             continue
@@ -41,6 +47,18 @@ def parse_and_fix_date(date_str):
     print(f"  ⚠️  Could not parse: {date_str}")
     return date_str  # Return as-is if can't parse
 
+DATE_COLUMNS = ('announcement_date', 'ex_date', 'record_date', 'final_date')
+BATCH_SIZE = 1000
+
+# (POSIX regex matching a legacy format, SQL expression rewriting it to YYYY-MM-DD)
+SQL_DATE_FIXES = [
+    (r'^\d{1,2} [A-Za-z]{3} \d{4}$', "to_char(to_date({col}, 'DD Mon YYYY'), 'YYYY-MM-DD')"),   # "17 Oct 2025"
+    (r'^\d{1,2}-[A-Za-z]{3}-\d{4}$', "to_char(to_date({col}, 'DD-Mon-YYYY'), 'YYYY-MM-DD')"),   # "17-Oct-2025"
+    (r'^\d{1,2}-\d{1,2}-\d{4}$', "to_char(to_date({col}, 'DD-MM-YYYY'), 'YYYY-MM-DD')"),       # "17-10-2025"
+    (r'^\d{1,2}/\d{1,2}/\d{4}$', "to_char(to_date({col}, 'DD/MM/YYYY'), 'YYYY-MM-DD')"),       # "17/10/2025"
+    (r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$', "left({col}, 10)"),                             # "2025-10-17 00:00:00"
+]
+
 def fix_database_dates():
     """Fix all date formats in database"""
     print("\n" + "=" * 70)
@@ -49,54 +67,62 @@ def fix_database_dates():
     
     db = SessionLocal()
     try:
-        # Get all records
-        records = db.query(CorporateAction).all()
-        print(f"\nFound {len(records)} records to check")
-        
         fixed_count = 0
         
-        for record in records:
-            updated = False
-            
-            # Fix announcement_date
-            if record.announcement_date:
-                fixed_date = parse_and_fix_date(record.announcement_date)
-                if fixed_date != record.announcement_date:
-                    print(f"  Fixing announcement_date: {record.announcement_date} -> {fixed_date}")
-                    record.announcement_date = fixed_date
-                    updated = True
-            
-            # Fix ex_date
-            if record.ex_date:
-                fixed_date = parse_and_fix_date(record.ex_date)
-                if fixed_date != record.ex_date:
-                    print(f"  Fixing ex_date: {record.ex_date} -> {fixed_date}")
-                    record.ex_date = fixed_date
-                    updated = True
-            
-            # Fix record_date
-            if record.record_date:
-                fixed_date = parse_and_fix_date(record.record_date)
-                if fixed_date != record.record_date:
-                    print(f"  Fixing record_date: {record.record_date} -> {fixed_date}")
-                    record.record_date = fixed_date
-                    updated = True
+        for column in DATE_COLUMNS:
+            # Placeholders become NULL
+            result = db.execute(text(f"UPDATE corporate_actions SET {column} = NULL WHERE {column} = 'N.A.'"))
+            fixed_count += result.rowcount
             
-            # Fix final_date
-            if record.final_date:
-                fixed_date = parse_and_fix_date(record.final_date)
-                if fixed_date != record.final_date:
-                    print(f"  Fixing final_date: {record.final_date} -> {fixed_date}")
-                    record.final_date = fixed_date
-                    updated = True
+            # One set-based UPDATE per legacy format
+            for pattern, expression in SQL_DATE_FIXES:
+                savepoint = db.begin_nested()
+                try:
+                    result = db.execute(
+                        text(f"UPDATE corporate_actions SET {column} = {expression.format(col=column)} "
+                             f"WHERE {column} ~ :pattern"),
+                        {"pattern": pattern}
+                    )
+                    savepoint.commit()
+                except Exception as e:
+                    # e.g. an out-of-range day; those rows are left to the row-by-row pass below
+                    savepoint.rollback()
+                    print(f"  ⚠️  Bulk fix of {column} ({pattern}) skipped: {e}")
+                    continue
+                if result.rowcount:
+                    print(f"  Fixed {result.rowcount} {column} values matching {pattern}")
+                    fixed_count += result.rowcount
             
-            if updated:
-                fixed_count += 1
+            # Whatever is still not YYYY-MM-DD goes through the Python parser, streamed in
+            # id-ordered batches (only id and the one column) and committed per batch
+            last_id = 0
+            while True:
+                batch = db.execute(
+                    text(f"SELECT id, {column} FROM corporate_actions "
+                         f"WHERE id > :last_id AND {column} <> '' AND {column} !~ :iso "
+                         f"ORDER BY id LIMIT :batch_size"),
+                    {"last_id": last_id, "iso": r'^\d{4}-\d{2}-\d{2}$', "batch_size": BATCH_SIZE}
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+                
+                updates = []
+                for record_id, value in batch:
+                    fixed_date = parse_and_fix_date(value)
+                    if fixed_date != value:
+                        print(f"  Fixing {column}: {value} -> {fixed_date}")
+                        updates.append({"value": fixed_date, "id": record_id})
+                
+                if updates:
+                    db.execute(text(f"UPDATE corporate_actions SET {column} = :value WHERE id = :id"), updates)
+                    fixed_count += len(updates)
+                db.commit()
         
         # Commit changes
         if fixed_count > 0:
             db.commit()
-            print(f"\n✅ Fixed {fixed_count} records")
+            print(f"\n✅ Fixed {fixed_count} date values")
         else:
             print("\n✅ All dates are already in correct format (YYYY-MM-DD)")
         
@@ -1,13 +1,36 @@
 """
 SQLAlchemy models for Corporate Actions database
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, UniqueConstraint, Index, Enum, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 from datetime import datetime
 
 Base = declarative_base()
 
+ACTION_TYPES = ('dividend', 'bonus', 'split', 'rights')
+
+
+class Security(Base):
+    """
+    Securities model - one row per company and market, holding the Alfago identifiers
+    """
+    __tablename__ = "securities"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    company_name = Column(String(500), nullable=False)
+    market_code = Column(String(10), nullable=True)  # 'NSE' or 'BSE'
+    security_id = Column(Integer, nullable=True, index=True)  # Alfago security ID
+    symbol = Column(String(50), nullable=True)  # Stock symbol
+    isin = Column(String(50), nullable=True)  # ISIN code
+
+    __table_args__ = (
+        UniqueConstraint('company_name', 'market_code', name='uix_security_company_market'),
+    )
+
+    def __repr__(self):
+        return f"<Security(id={self.id}, company={self.company_name}, market={self.market_code}, symbol={self.symbol})>"
+
 
 class CorporateAction(Base):
     """
@@ -19,17 +42,15 @@ class CorporateAction(Base):
     
     # Company identification
     company_name = Column(String(500), nullable=False, index=True)
-    security_id = Column(Integer, nullable=True, index=True)  # Alfago security ID
     market_code = Column(String(10), nullable=True, index=True)  # 'NSE' or 'BSE'
-    symbol = Column(String(50), nullable=True)  # Stock symbol
-    isin = Column(String(50), nullable=True)  # ISIN code
+    security_fk = Column(Integer, ForeignKey('securities.id'), nullable=True, index=True)  # symbol/ISIN live in securities
     
     # Action details
-    action_type = Column(String(50), nullable=False, index=True)  # 'dividend', 'bonus', 'split', 'rights'
-    announcement_date = Column(String(50))
-    ex_date = Column(String(50), index=True)
-    record_date = Column(String(50))
-    final_date = Column(String(50))
+    action_type = Column(Enum(*ACTION_TYPES, name='action_type_enum'), nullable=False, index=True)
+    announcement_date = Column(Date)
+    ex_date = Column(Date, index=True)
+    record_date = Column(Date)
+    final_date = Column(Date)
     
     # Dividend specific
     dividend_rate = Column(Float, nullable=True)
@@ -55,9 +76,19 @@ class CorporateAction(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
 
     __table_args__ = (
+        # NULLS NOT DISTINCT so rows without an announcement date still deduplicate (PostgreSQL 15+)
         UniqueConstraint('company_name', 'action_type', 'market_code', 'announcement_date', 'ex_date', 
-                        name='uix_company_action_market_dates'),
+                        name='uix_company_action_market_dates', postgresql_nulls_not_distinct=True),
+        # Composite indexes matching the API's date-range filters
+        Index('idx_ca_exdate_type', 'ex_date', 'action_type'),
+        Index('idx_ca_exdate_id', 'ex_date', 'id'),  # keyset pagination order
+        Index('idx_ca_finaldate_type_market', 'final_date', 'action_type', 'market_code'),
     )
 
     def __repr__(self):
         return f"<CorporateAction(id={self.id}, company={self.company_name}, type={self.action_type}, market={self.market_code}, ex_date={self.ex_date})>"
+
+
+# Trigram index over lower(company_name) for case-insensitive partial search (requires pg_trgm)
+Index('idx_ca_company_lower_trgm', func.lower(CorporateAction.company_name).label('company_name_lower'),
+      postgresql_using='gin', postgresql_ops={'company_name_lower': 'gin_trgm_ops'})
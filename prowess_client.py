@@ -1,140 +1,463 @@
-import requests, zipfile, io, os, json, pandas as pd, time
+import requests, zipfile, io, os, pandas as pd, time, shutil, tempfile, asyncio, itertools, functools, hashlib
+import aiohttp, orjson, ijson, numpy as np, pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import config
 
+# One pooled keep-alive session for all Prowess calls (no TLS handshake per request)
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=Retry(total=3, backoff_factor=0.5))
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+def _extract_zip(fileobj, out_dir=None):
+    """Extract every non-.lst member of a batch ZIP into out_dir (default TMP_DIR) and return the written paths"""
+    z = zipfile.ZipFile(fileobj)
+    tmp_dir = out_dir or config.TMP_DIR
+    files = []
+    for info in z.infolist():
+        name = info.filename
+        if name.lower().endswith(".lst"): continue
+        # ZIP member names always use "/", so no os.sep handling is needed
+        out_path = os.path.join(tmp_dir, name.rsplit("/", 1)[-1])
+        size = info.file_size
+        with z.open(info) as src, open(out_path, "wb") as out:
+            # Reserve the full size up front (Linux) so the chunked writes land contiguously
+            if size and hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(out.fileno(), 0, size)
+                except OSError:
+                    pass  # unsupported on some tmpfs/overlay/NFS mounts; only an optimisation
+            # Inflate straight to disk in 1 MiB chunks instead of holding the whole member
+            shutil.copyfileobj(src, out, 1 << 20)
+        files.append(out_path)
+    return files
+
 def send_batch(batch_path, fmt="json"):
-    files = {"batchfile": open(batch_path, "rb")}
     data = {"apikey": config.PROWESS_API_KEY, "format": fmt}
-    r = requests.post(config.SENDBATCH_URL, data=data, files=files)
-    files["batchfile"].close()
+    with open(batch_path, "rb") as fh:
+        # (connect, read) timeouts so a hung connection can't hold the handle and socket forever
+        r = _SESSION.post(config.SENDBATCH_URL, data=data,
+                          files={"batchfile": (os.path.basename(batch_path), fh, "application/octet-stream")},
+                          timeout=(5, 60))
     r.raise_for_status()
     j = r.json()
     if "token" not in j:
         raise Exception(f"Bad response: {j}")
     return j["token"]
 
-def get_batch(token, poll_interval=3, timeout=300):
+def _read_zip(fileobj):
+    """Read every non-.lst member of a batch ZIP into memory and return (name, bytes) pairs"""
+    z = zipfile.ZipFile(fileobj)
+    pairs = []
+    for info in z.infolist():
+        name = info.filename
+        if name.lower().endswith(".lst"): continue
+        # Larger reads mean fewer inflate calls
+        with io.BufferedReader(z.open(info), buffer_size=1 << 20) as src:
+            pairs.append((name.rsplit("/", 1)[-1], src.read()))
+    return pairs
+
+def get_batch(token, poll_intervals=(2, 3, 5, 8), timeout=300, out_dir=None):
+    """
+    Poll until the batch is ready (backing off 2s -> 3s -> 5s -> 8s), then extract the ZIP into out_dir
+    (default TMP_DIR; pass a private directory when fetching batches concurrently)
+    """
+    return _poll_batch(token, poll_intervals, timeout, functools.partial(_extract_zip, out_dir=out_dir))
+
+def get_batch_inmemory(token, poll_intervals=(2, 3, 5, 8), timeout=300):
+    """Like get_batch, but return the ZIP members as (name, bytes) pairs instead of writing them to disk"""
+    return _poll_batch(token, poll_intervals, timeout, _read_zip)
+
+_STATUS_MAX_BYTES = 64 << 10  # most a poll will read of a non-ZIP status response
+
+def _poll_batch(token, poll_intervals, timeout, unpack):
+    """Poll GETBATCH until the ZIP arrives, then return unpack(zip file object)"""
     start = time.time()
-    elapsed = 0
+    attempt = 0
     while True:
-        r = requests.post(config.GETBATCH_URL, data={"apikey": config.PROWESS_API_KEY, "token": token})
-        if "application/json" not in r.headers.get("Content-Type", "").lower() and r.content[:2] == b"PK":
-            z = zipfile.ZipFile(io.BytesIO(r.content))
-            files = []
-            for name in z.namelist():
-                if name.lower().endswith(".lst"): continue
-                out_path = os.path.join(config.TMP_DIR, os.path.basename(name))
-                with z.open(name) as src, open(out_path, "wb") as out:
-                    out.write(src.read())
-                files.append(out_path)
-            return files
-        elif time.time() - start > timeout:
+        with _SESSION.post(config.GETBATCH_URL, data={"apikey": config.PROWESS_API_KEY, "token": token},
+                           stream=True, timeout=(5, 120)) as r:
+            r.raw.decode_content = True
+            # Headers plus the first two bytes tell a JSON status document from the ZIP payload
+            is_json = "application/json" in r.headers.get("Content-Type", "").lower()
+            magic = b"" if is_json else r.raw.read(2)
+            if magic == b"PK":
+                # Stream the ZIP to a spooled temp file (in memory up to 64 MiB) instead of r.content
+                with tempfile.SpooledTemporaryFile(max_size=64 << 20) as spool:
+                    spool.write(magic)
+                    shutil.copyfileobj(r.raw, spool, length=1 << 20)
+                    spool.seek(0)
+                    return unpack(spool)
+            # Drain the small "still processing" document (bounded) so the keep-alive connection is reused
+            r.raw.read(_STATUS_MAX_BYTES)
+        if time.time() - start > timeout:
             raise TimeoutError("Timeout waiting for batch")
+        delay = poll_intervals[min(attempt, len(poll_intervals) - 1)]
+        attempt += 1
+        elapsed = int(time.time() - start)
+        print(f"Still processing batch... ({elapsed}s elapsed)"); time.sleep(delay)
+
+async def send_batch_async(session, batch_path, fmt="json"):
+    form = aiohttp.FormData()
+    form.add_field("apikey", config.PROWESS_API_KEY)
+    form.add_field("format", fmt)
+    with open(batch_path, "rb") as fh:
+        form.add_field("batchfile", fh, filename=os.path.basename(batch_path))
+        async with session.post(config.SENDBATCH_URL, data=form) as r:
+            r.raise_for_status()
+            j = await r.json(content_type=None)
+    if "token" not in j:
+        raise Exception(f"Bad response: {j}")
+    return j["token"]
+
+async def get_batch_async(session, token, poll_intervals=(2, 3, 5, 8), timeout=300, out_dir=None):
+    """Async get_batch: polls with asyncio.sleep so many tokens can wait on one event loop"""
+    start = time.time()
+    attempt = 0
+    while True:
+        async with session.post(config.GETBATCH_URL, data={"apikey": config.PROWESS_API_KEY, "token": token}) as r:
+            magic = b""
+            if "application/json" not in r.headers.get("Content-Type", "").lower():
+                try:
+                    magic = await r.content.readexactly(2)
+                except asyncio.IncompleteReadError:
+                    pass
+            if magic == b"PK":
+                with tempfile.SpooledTemporaryFile(max_size=64 << 20) as spool:
+                    spool.write(magic)
+                    async for chunk in r.content.iter_chunked(1 << 20):
+                        spool.write(chunk)
+                    spool.seek(0)
+                    # Extraction is blocking disk IO; keep it off the event loop
+                    return await asyncio.to_thread(_extract_zip, spool, out_dir)
+            # Drain the small "still processing" document (bounded) so the keep-alive connection is reused
+            remaining = _STATUS_MAX_BYTES
+            while remaining > 0:
+                chunk = await r.content.read(remaining)
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+        if time.time() - start > timeout:
+            raise TimeoutError("Timeout waiting for batch")
+        delay = poll_intervals[min(attempt, len(poll_intervals) - 1)]
+        attempt += 1
+        elapsed = int(time.time() - start)
+        print(f"Still processing batch {token}... ({elapsed}s elapsed)"); await asyncio.sleep(delay)
+
+async def _gather(tokens, limit=8):
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=limit)) as session:
+        # One directory per token: concurrent batches can return members with the same name
+        return await asyncio.gather(*[
+            get_batch_async(session, token, out_dir=tempfile.mkdtemp(dir=config.TMP_DIR)) for token in tokens
+        ])
+
+def get_many(tokens):
+    """Poll and download several batch tokens concurrently; returns one file list per token, in order
+    (each token's files sit in their own directory under TMP_DIR)"""
+    return asyncio.run(_gather(tokens))
+
+def _frame_from_rows(rows, columns):
+    """Build a DataFrame column-wise from list-of-lists rows (one transpose, then per-column arrays)"""
+    columns = list(columns)
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    # zip_longest pads short rows with None, as pandas does for ragged list-of-lists
+    cols = list(itertools.zip_longest(*rows))
+    if len(cols) != len(columns):
+        # Same check as pd.DataFrame(rows, columns=columns): never silently drop data or headers
+        raise ValueError(f"{len(columns)} columns passed, passed data had {len(cols)} columns")
+    try:
+        # Arrow infers each column's type in one C-level pass and hands pandas Arrow-backed columns
+        arrays = [pa.array(c) for c in cols]
+        # An all-None column would come out as null[pyarrow]; give it a concrete (string) type
+        arrays = [a.cast(pa.string()) if pa.types.is_null(a.type) else a for a in arrays]
+        tbl = pa.Table.from_arrays(arrays, names=columns)
+        return tbl.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        pass  # mixed-type column or an int beyond int64: fall back to object columns
+    # Positional keys keep duplicate header names intact
+    df = pd.DataFrame(dict(enumerate(cols)), copy=False)
+    df.columns = columns
+    return df
+
+_STREAM_MIN_BYTES = 50 << 20  # files above this are streamed with ijson instead of loaded whole
+
+def _stream_head_data(p):
+    """
+    Stream a large CMIE head/data file without reading it into memory in one piece
+    
+    Returns {"head": ..., "data": ...}, or None if the file isn't an object with a "head" key
+    """
+    with open(p, "rb") as f:
+        # Only a top-level object can have "head"; otherwise ijson would scan the whole file for nothing
+        if not f.read(4096).lstrip().startswith(b"{"):
+            return None
+        f.seek(0)
+        # "head" precedes "data" in CMIE responses, so this stops early
+        head = next(ijson.items(f, "head"), None)
+    if head is None:
+        return None
+    with open(p, "rb") as f:
+        data = list(ijson.items(f, "data.item", use_float=True))
+    return {"head": head, "data": data}
+
+def _cache_key(p):
+    """Hash of a file's full contents, used to name its parquet cache entry (far cheaper than the parse it skips)"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _parse_one(p):
+    """
+    Parse one JSON file (runs in a worker process), reusing a cached parquet copy when present
+    
+    Returns (df, file_info, None) for head/data and array files, (None, file_info, obj) for a
+    top-level object, or None for anything else
+    """
+    key = _cache_key(p)
+    for structure in ("head_data_cmie", "array"):
+        cache_path = os.path.join(config.PARSE_CACHE_DIR, f"{key}-{structure}.parquet")
+        if os.path.exists(cache_path):
+            # Arrow-backed dtypes, same as a fresh parse
+            df = pd.read_parquet(cache_path, dtype_backend="pyarrow")
+            return df, {
+                "filename": os.path.basename(p),
+                "structure": structure,
+                "columns": list(df.columns),
+                "rows": len(df)
+            }, None
+    
+    result = _parse_json(p)
+    if result is not None and result[0] is not None:
+        df, file_info, _ = result
+        cache_path = os.path.join(config.PARSE_CACHE_DIR, f"{key}-{file_info['structure']}.parquet")
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+            os.replace(tmp_path, cache_path)  # atomic, so a concurrent reader never sees a partial file
+        except (ValueError, TypeError, OSError) as e:
+            # Duplicate or mixed-type columns can't be stored as parquet; just parse again next time
+            print(f"⚠️ Not caching {os.path.basename(p)}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return result
+
+def _parse_json(p):
+    """Parse one JSON file into (df, file_info, obj) as described in _parse_one"""
+    js = _stream_head_data(p) if os.path.getsize(p) > _STREAM_MIN_BYTES else None
+    if js is None:
+        with open(p, "rb") as f:
+            js = orjson.loads(f.read())
+    return _frame_json(js, os.path.basename(p))
+
+def _frame_json(js, filename):
+    """Frame one decoded JSON document into (df, file_info, obj) as described in _parse_one"""
+    # Handle different JSON structures from CMIE
+    if isinstance(js, dict) and "data" in js and "head" in js:
+        # CMIE format with head and data
+        headers = js["head"]
+        data = js["data"]
+        
+        # Handle multi-level headers
+        if isinstance(headers[0], list) and len(headers[0]) > 1:
+            # Multi-level header - find the actual column names: the last row that
+            # looks like column names, scanning from the end; fall back to the last row
+            actual_headers = next(
+                (header_row for header_row in reversed(headers)
+                 if header_row
+                 and any(h and h.strip() for h in header_row)
+                 and any(h and not h.startswith("Output source") for h in header_row)),
+                headers[-1] if headers else []
+            )
+            
+            # Clean up headers - replace empty strings and None values
+            clean_headers = [h.strip() if h and h.strip() else f"Column_{i+1}" for i, h in enumerate(actual_headers)]
+            
+            # Ensure we have the right number of columns
+            num_cols = len(data[0]) if data else len(clean_headers)
+            while len(clean_headers) < num_cols:
+                clean_headers.append(f"Column_{len(clean_headers)+1}")
+            
+            # Create DataFrame
+            df = _frame_from_rows(data, clean_headers[:num_cols])
+            
+        else:
+            # Simple header
+            df = _frame_from_rows(data, headers[0] if isinstance(headers[0], list) else headers)
+        
+        return df, {
+            "filename": filename,
+            "structure": "head_data_cmie",
+            "columns": list(df.columns),
+            "rows": len(data)
+        }, None
+        
+    elif isinstance(js, list):
+        # Array of objects - from_records skips the generic constructor's per-element inference
+        if js and all(isinstance(x, (dict, list, tuple)) for x in js):
+            df = pd.DataFrame.from_records(js)
         else:
-            elapsed = int(time.time() - start)
-            print(f"Still processing batch... ({elapsed}s elapsed)"); time.sleep(poll_interval)
+            df = pd.DataFrame(js)  # array of scalars: one column
+        return df, {
+            "filename": filename,
+            "structure": "array",
+            "columns": list(df.columns) if not df.empty else [],
+            "rows": len(js)
+        }, None
+    elif isinstance(js, dict):
+        # Direct object - returned as a plain row, framed together with the others by the caller
+        return None, {
+            "filename": filename,
+            "structure": "object",
+            "columns": list(js) if js else [],
+            "rows": 1
+        }, js
+    return None
+
+def _downcast_float(s, float32):
+    """float32 copy of s if every value survives the round trip, else s unchanged"""
+    down = s.astype(float32)
+    return down if down.astype(s.dtype).equals(s) else s
 
-def parse_json_files(paths):
-    """Parse JSON files from CMIE API response with support for complex headers"""
+def _downcast_int(s, int_dtype):
+    """s in the narrowest signed int type (via int_dtype(bits)) that holds its range"""
+    if s.isna().all():
+        return s
+    lo, hi = s.min(), s.max()
+    for bits in (8, 16, 32):
+        info = np.iinfo(f"int{bits}")
+        if info.min <= lo and hi <= info.max:
+            return s.astype(int_dtype(bits))
+    return s
+
+def _compact(df):
+    """Downcast numeric columns and turn low-cardinality string columns into categoricals, in place"""
+    # By position: header names may repeat
+    for i, dtype in enumerate(list(df.dtypes)):
+        s = df.iloc[:, i]
+        if isinstance(dtype, pd.ArrowDtype):
+            t = dtype.pyarrow_dtype
+            if pa.types.is_float64(t):
+                df.isetitem(i, _downcast_float(s, pd.ArrowDtype(pa.float32())))
+                continue
+            if pa.types.is_signed_integer(t):
+                df.isetitem(i, _downcast_int(s, lambda bits: pd.ArrowDtype(getattr(pa, f"int{bits}")())))
+                continue
+            if not pa.types.is_string(t):
+                continue
+        elif pd.api.types.is_float_dtype(dtype):
+            # Only when lossless: these are financial values
+            df.isetitem(i, _downcast_float(s, np.float32))
+            continue
+        elif pd.api.types.is_signed_integer_dtype(dtype):
+            # Ints stay ints (float32 would round large ids)
+            df.isetitem(i, _downcast_int(s, lambda bits: f"int{bits}"))
+            continue
+        elif dtype != object:
+            continue
+        # Repeated tickers, sectors, source files... store each distinct value once
+        try:
+            if s.nunique(dropna=True) / max(len(s), 1) < 0.5:
+                df.isetitem(i, s.astype("category"))
+        except TypeError:
+            pass  # nested dicts/lists aren't hashable: leave the column as it is
+    return df
+
+def parse_json_files(paths, compact=True):
+    """
+    Parse JSON files from CMIE API response with support for complex headers
+    
+    Args:
+        paths: Extracted batch file paths; non-.json files are skipped
+        compact: Downcast floats and categorize low-cardinality string columns in the result
+    
+    Returns:
+        (DataFrame of all rows, metadata dict with per-file info and total_rows)
+    """
+    json_paths = [p for p in paths if p.endswith(".json")]
+    if len(json_paths) > 2:
+        # Files are independent and parsing is CPU-bound, so spread them over processes
+        with ProcessPoolExecutor(max_workers=min(8, len(json_paths))) as executor:
+            results = list(executor.map(_parse_one, json_paths, chunksize=4))
+    else:
+        # Not worth the pool startup for one or two files
+        results = [_parse_one(p) for p in json_paths]
+    
+    return _combine([os.path.basename(p) for p in json_paths], results, compact)
+
+def parse_json_files_bytes(pairs, compact=True):
+    """
+    Parse (name, bytes) pairs from get_batch_inmemory, like parse_json_files but without touching disk
+    
+    Args:
+        pairs: (member name, raw bytes) pairs; non-.json members are skipped
+        compact: Downcast floats and categorize low-cardinality string columns in the result
+    
+    Returns:
+        (DataFrame of all rows, metadata dict with per-file info and total_rows)
+    """
+    names, results = [], []
+    for name, raw in pairs:
+        if name.endswith(".json"):
+            names.append(name)
+            results.append(_frame_json(orjson.loads(raw), name))
+    return _combine(names, results, compact)
+
+def _combine(names, results, compact):
+    """Concatenate per-file _parse_one results (in file order) into the final frame and metadata"""
+    parsed_at = pd.Timestamp.now()  # one timestamp for the whole batch parse
     dfs = []
+    src_names, n_rows = [], []  # per-frame source file and row count, for the source_file column
+    dict_rows, dict_sources = [], []  # top-level object files, one row each
     parsed_data = {"files": [], "total_rows": 0}
     
-    for p in paths:
-        if p.endswith(".json"):
-            with open(p) as f: 
-                js = json.load(f)
-            
-            # Handle different JSON structures from CMIE
-            if isinstance(js, dict) and "data" in js and "head" in js:
-                # CMIE format with head and data
-                headers = js["head"]
-                data = js["data"]
-                
-                # Handle multi-level headers
-                if isinstance(headers[0], list) and len(headers[0]) > 1:
-                    # Multi-level header - find the actual column names
-                    # Look for the row with actual column names (usually the last non-empty row)
-                    actual_headers = None
-                    for header_row in headers:
-                        if header_row and any(h and h.strip() for h in header_row):
-                            # Check if this looks like actual column names
-                            if any(h for h in header_row if h and not h.startswith("Output source") and h != ""):
-                                actual_headers = header_row
-                    
-                    if actual_headers is None:
-                        # Fallback - use the last header row
-                        actual_headers = headers[-1] if headers else []
-                    
-                    # Clean up headers - remove empty strings and None values
-                    clean_headers = []
-                    for i, h in enumerate(actual_headers):
-                        if h and h.strip():
-                            clean_headers.append(h.strip())
-                        else:
-                            clean_headers.append(f"Column_{i+1}")
-                    
-                    # Ensure we have the right number of columns
-                    num_cols = len(data[0]) if data else len(clean_headers)
-                    while len(clean_headers) < num_cols:
-                        clean_headers.append(f"Column_{len(clean_headers)+1}")
-                    
-                    # Create DataFrame
-                    df = pd.DataFrame(data, columns=clean_headers[:num_cols])
-                    
-                else:
-                    # Simple header
-                    df = pd.DataFrame(data, columns=headers[0] if isinstance(headers[0], list) else headers)
-                
-                parsed_data["files"].append({
-                    "filename": os.path.basename(p),
-                    "structure": "head_data_cmie",
-                    "columns": list(df.columns),
-                    "rows": len(data)
-                })
-                
-            elif isinstance(js, list):
-                # Array of objects
-                df = pd.DataFrame(js)
-                parsed_data["files"].append({
-                    "filename": os.path.basename(p),
-                    "structure": "array",
-                    "columns": list(df.columns) if not df.empty else [],
-                    "rows": len(js)
-                })
-            elif isinstance(js, dict):
-                # Direct object
-                df = pd.DataFrame([js])
-                parsed_data["files"].append({
-                    "filename": os.path.basename(p),
-                    "structure": "object",
-                    "columns": list(df.columns) if not df.empty else [],
-                    "rows": 1
-                })
-            else:
-                continue
-                
-            if not df.empty:
-                # Add metadata
-                df['source_file'] = os.path.basename(p)
-                df['parsed_at'] = pd.Timestamp.now()
-                dfs.append(df)
+    for name, result in zip(names, results):
+        if result is None:
+            continue
+        df, file_info, obj = result
+        parsed_data["files"].append(file_info)
+        
+        if obj is not None:
+            if obj:
+                dict_rows.append(obj)
+                dict_sources.append(name)
+        elif not df.empty:
+            dfs.append(df)
+            src_names.append(name)
+            n_rows.append(len(df))
     
-    final_df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+    if dict_rows:
+        # One frame for all single-object files instead of a one-row frame each
+        dfs.append(pd.DataFrame.from_records(dict_rows))
+        src_names.extend(dict_sources)
+        n_rows.extend([1] * len(dict_sources))
+    
+    final_df = pd.concat(dfs, ignore_index=True, copy=False) if dfs else pd.DataFrame()
+    if dfs:
+        # Add metadata once on the combined frame rather than copying every per-file frame
+        final_df['source_file'] = np.repeat(np.asarray(src_names, dtype=object), n_rows)
+        final_df['parsed_at'] = parsed_at
+        if compact:
+            _compact(final_df)
     parsed_data["total_rows"] = len(final_df)
     
     return final_df, parsed_data
 
+# (keywords, data type) in priority order; the first rule with a keyword in the filename wins
+_TYPE_RULES = (
+    (("equity", "ownership"), "equity_ownership"),
+    (("financial", "results"), "financial_results"),
+    (("balance",), "balance_sheet"),
+    (("ratio",), "financial_ratios"),
+    (("company",), "company_info"),
+)
+
+@functools.lru_cache(maxsize=2048)
 def get_data_type_from_filename(filename):
     """Infer data type from filename"""
     filename_lower = filename.lower()
-    if 'equity' in filename_lower or 'ownership' in filename_lower:
-        return 'equity_ownership'
-    elif 'financial' in filename_lower or 'results' in filename_lower:
-        return 'financial_results'
-    elif 'balance' in filename_lower:
-        return 'balance_sheet'
-    elif 'ratio' in filename_lower:
-        return 'financial_ratios'
-    elif 'company' in filename_lower:
-        return 'company_info'
-    else:
-        return 'general_data'
+    return next((label for keywords, label in _TYPE_RULES if any(k in filename_lower for k in keywords)), "general_data")
@@ -2,24 +2,29 @@
 Pydantic schemas for API request/response validation
 """
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
-from datetime import datetime
+from typing import Literal, Optional
+from datetime import date, datetime
+
+# Values of the action_type_enum column
+ActionType = Literal['dividend', 'bonus', 'split', 'rights']
 
 
 class CorporateActionBase(BaseModel):
     """Base schema for Corporate Action"""
+    # Unknown keys are dropped and the validator is only built on first use
+    model_config = ConfigDict(extra='ignore', validate_assignment=False, defer_build=True)
+
     company_name: str
-    action_type: str
-    announcement_date: Optional[str] = None
-    ex_date: Optional[str] = None
-    record_date: Optional[str] = None
-    final_date: Optional[str] = None
+    action_type: ActionType
+    announcement_date: Optional[date] = None
+    ex_date: Optional[date] = None
+    record_date: Optional[date] = None
+    final_date: Optional[date] = None
     dividend_rate: Optional[float] = None
     dividend_type: Optional[str] = None
     ratio_numerator: Optional[float] = None
     ratio_denominator: Optional[float] = None
     security_type: Optional[str] = None
-    raw_data: Optional[str] = None
     
     # New fields from Alfago API integration
     security_id: Optional[int] = None
@@ -40,22 +45,30 @@ class CorporateActionBase(BaseModel):
 
 class CorporateActionCreate(CorporateActionBase):
     """Schema for creating a corporate action"""
-    pass
+    raw_data: Optional[str] = None
 
 
 class CorporateActionOut(CorporateActionBase):
     """Schema for corporate action output"""
     id: int
     created_at: datetime
+    raw_data: Optional[str] = None
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
+
+
+class CorporateActionRow(CorporateActionBase):
+    """Schema for one row of a corporate actions listing (ACTION_COLUMNS; no raw_data)"""
+    id: int
+    created_at: datetime
 
 
 class CorporateActionsResponse(BaseModel):
     """Response schema for list of corporate actions"""
     status: str
     count: int
-    data: list[dict]
+    data: list[CorporateActionRow]
+    next_cursor: Optional[str] = None
     metadata: Optional[dict] = None
 
 